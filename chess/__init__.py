@@ -2,22 +2,26 @@ __author__ = "Markus Koch"
 __status__ = "Production"
 __version__ = "0.4.3"
 
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor, Future, wait
 
 import chess.pieces as p
 import pygame
-import sys
 
-from chess.players import HumanPlayer, RandomPlayer, MiniMaxPlayer, MiniMaxIterativePlayer
+from chess.players import HumanPlayer, RandomPlayer, MiniMaxPlayer
 from chess.player import ComputerizedPlayer
 from chess.board import Board
-from chess.move import Move
 
 SIZE: int = 60
 IMAGES: dict = {}
 COLORS: dict[str, tuple] = {'white': (240, 240, 240), 'gray': (180, 180, 180),
                             'green': (0, 255, 0), 'yellow': (255, 255, 0), 'red': (255, 0, 0)}
 
+# the window is redrawn with this rate, also while a computerized player is searching
+FPS: int = 60
+
+# the frames of each step of a move: the highlighting of a computer move, the animation per square and the pause
+STEPS: dict[str, int] = {'highlight': 60, 'animate': 6, 'pause': 30}
+
 
 class Game:
     players: dict = {
@@ -25,6 +29,8 @@ class Game:
         '1': RandomPlayer(color='white'),
         # '1': MiniMaxPlayer(color='white', max_depth=3),
         '2': MiniMaxPlayer(color='black', max_depth=3)
+        # '2': NegaScoutPlayer(color='black', max_depth=4)
+        # '2': NegaScoutPlayer(color='black', max_depth=64, movetime=2, ponder=True)
     }
 
     def __init__(self):
@@ -38,11 +44,27 @@ class Game:
         self.players.get('1').set_enemy(self.board)
         self.players.get('2').set_enemy(self.board)
         self.display = pygame.display.set_mode((8 * SIZE, 8 * SIZE))
+        self.clock = pygame.time.Clock()
         self.player: int = 1
 
+        # 'checkmate' or 'stalemate' when the game is over, it is only updated when the position changes
+        self.result: str = self.game_result()
+
+        # the selected piece of the human player, its moves and the color of the selected square
         self.human_moves: list[tuple] = []
+        self.selected: tuple = ()
+        self.selected_color: str = 'green'
+
+        # a computerized player searches a copy of the board in a worker thread, so the window keeps responding
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.search: Future = None
+        self.searching_player: object = None
 
-        self.__draw()
+        # the move which is shown, its current step (see STEPS) and the frames left of the step
+        self.move: object = None
+        self.step: str = None
+        self.frames: int = 0
+        self.highlighted: list[object] = []
 
         while self.running:
             current_player = self.players.get(str(self.player))
@@ -54,27 +76,39 @@ class Game:
                 elif event.type == pygame.KEYDOWN:
                     # start a new game
                     if event.key == pygame.K_n:
+                        self.cancel()
                         self.board = Board(self.players)
                         self.players.get('1').set_enemy(self.board)
                         self.players.get('2').set_enemy(self.board)
                         self.player: int = 1
+                        self.result = self.game_result()
 
                     # undoes the last move
                     elif event.key == pygame.K_r:
+                        self.cancel()
+
                         # sets the player to 1 if move_log is empty
                         if self.board.undo_move():
                             self.player = (self.player % 2) + 1
                         else:
                             self.player = 1
 
+                        self.result = self.game_result()
+
                     # removes the selection
                     elif event.key == pygame.K_d:
                         self.human_moves = []
+                        self.selected = ()
 
-                    self.__draw()
+                    # skips the highlighting, the animation and the pause of a move
+                    elif event.key == pygame.K_SPACE:
+                        self.skip()
 
                 elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if isinstance(current_player, HumanPlayer):
+                    if self.move is not None:
+                        self.skip()
+
+                    elif isinstance(current_player, HumanPlayer):
                         location: tuple = pygame.mouse.get_pos()
                         column: int = location[0] // SIZE
                         row: int = location[1] // SIZE
@@ -85,110 +119,185 @@ class Game:
                             moves = chosen_piece.legal_moves(self.board)
 
                             if len(moves) != 0:
-                                start_column = moves[0].start_column
-                                start_row = moves[0].start_row
-
                                 self.human_moves = moves
-                                self.highlight(self.human_moves, (start_row, start_column))
+                                self.selected, self.selected_color = (row, column), 'green'
                             else:
-                                self.highlight([], (row, column), color='red')
+                                self.selected, self.selected_color = (row, column), 'red'
 
                         if len(self.human_moves) != 0:
                             for human_move in self.human_moves:
                                 if (human_move.end_row == row) and (human_move.end_column == column):
                                     current_player.set_move(human_move)
                                     self.human_moves = []
+                                    self.selected = ()
 
-            next_move = current_player.best_move(self.board)
+            if self.running:
+                self.update(current_player)
+                self.__draw()
+
+            self.clock.tick(FPS)
+
+        self.cancel()
+        self.executor.shutdown()
 
-            if current_player.is_checkmate or current_player.is_stalemate:
-                print('print comes from inside init')
-                self.board.print_console()
-                sys.exit(1)
+    def update(self, current_player: object):
+        # the shown move advances by one frame, the next move is only requested when it is played
+        if self.move is not None:
+            self.frames -= 1
+            if self.frames <= 0:
+                self.next_step()
+            return
 
+        if self.result is not None:
+            return
+
+        if isinstance(current_player, HumanPlayer):
+            next_move = current_player.best_move(self.board)
             if next_move is not None:
-                if isinstance(current_player, ComputerizedPlayer):
-                    moving_piece = next_move.moved_piece
-                    start = (next_move.start_row, next_move.start_column)
-                    self.highlight(moving_piece.legal_moves(self.board), start)
-                    sleep(1)
-                elif isinstance(current_player, HumanPlayer):
-                    current_player.set_move(None)
-
-                if self.running:
-                    self.animate_move(next_move)
-                    self.board.move_piece(next_move)
-
-                self.player = (self.player % 2) + 1
-                self.__draw()
-                sleep(0.5)
+                current_player.set_move(None)
+                self.show(next_move, 'animate')
+            return
+
+        # the result of the search is polled every frame
+        if self.search is None:
+            self.searching_player = current_player
+            self.search = self.executor.submit(current_player.best_move, self.board.copy())
+        elif self.search.done():
+            next_move = self.search.result()
+            self.search = None
+            if next_move is not None:
+                self.show(next_move, 'highlight')
 
-    def highlight(self, valid_moves, selected, color='green'):
-        self.__draw_board()
+    def show(self, move: object, step: str):
+        self.move = move
+        self.step = step
+        self.frames = STEPS[step] * (self.distance(move) if step == 'animate' else 1)
+
+        if step == 'highlight':
+            self.highlighted = move.moved_piece.legal_moves(self.board)
+
+    def next_step(self):
+        if self.step == 'highlight':
+            self.show(self.move, 'animate')
 
-        if selected != ():
-            r, c = selected
+        elif self.step == 'animate':
+            current_player = self.players.get(str(self.player))
+            self.board.move_piece(self.move)
+            self.result = self.game_result()
+
+            # the engine searches the predicted reply while the opponent is thinking
+            if self.result is None and isinstance(current_player, ComputerizedPlayer):
+                current_player.start_pondering(self.board)
+
+            self.player = (self.player % 2) + 1
+            self.show(self.move, 'pause')
+
+        else:
+            self.move = None
+            self.step = None
+
+    def skip(self):
+        # the move is still played, only the remaining frames are dropped
+        while self.move is not None:
+            self.next_step()
+
+    def cancel(self):
+        # a running search and the pondering of the engines are stopped, the stop of a 'MiniMaxPlayer' also reaches
+        # its worker processes, the shown move is dropped before it is played
+        if self.search is not None:
+            while not self.search.done():
+                self.searching_player.stop()
+                wait([self.search], timeout=0.01)
+
+            self.search = None
+
+        if self.step in ('highlight', 'animate'):
+            self.move = None
+            self.step = None
+
+        self.stop_pondering()
+        self.human_moves = []
+        self.selected = ()
+
+    def game_result(self) -> str:
+        # all legal moves are generated, so it is only called when the position has changed and not every frame
+        position = self.board.position
+        if len(position.legal_moves()) != 0:
+            return None
+
+        result = 'checkmate' if position.in_check() else 'stalemate'
+        print(f'{result} after {len(self.board.move_log)} moves, press n for a new game')
+        self.board.print_console()
+        self.stop_pondering()
+
+        return result
+
+    def stop_pondering(self):
+        # the background search of an engine belongs to a position which is no longer played
+        for player in self.players.values():
+            if isinstance(player, ComputerizedPlayer):
+                player.stop_pondering()
 
-            # initial setup for surfaces
-            square = pygame.Surface((SIZE, SIZE))
-            square.set_alpha(100)
+    @staticmethod
+    def distance(move: object) -> int:
+        return abs(move.end_row - move.start_row) + abs(move.end_column - move.start_column)
 
-            # highlight selected square
-            square.fill(pygame.Color(COLORS.get(color)))
-            self.display.blit(square, (c * SIZE, r * SIZE))
+    def highlight(self, valid_moves, selected, color='green'):
+        r, c = selected
 
-            # highlight squares which valid moves
-            square.fill(COLORS.get('yellow'))
+        # initial setup for surfaces
+        square = pygame.Surface((SIZE, SIZE))
+        square.set_alpha(100)
 
-            if len(valid_moves) != 0:
-                for valid_move in valid_moves:
-                    if (valid_move.start_row == r) and (valid_move.start_column == c):
-                        column = (valid_move.end_column * SIZE)
-                        row = (valid_move.end_row * SIZE)
-                        self.display.blit(square, (column, row))
+        # highlight selected square
+        square.fill(pygame.Color(COLORS.get(color)))
+        self.display.blit(square, (c * SIZE, r * SIZE))
 
-        self.__draw_pieces()
+        # highlight squares which valid moves
+        square.fill(COLORS.get('yellow'))
 
-    def animate_move(self, selected_move: object):
-        clock = pygame.time.Clock()
+        if len(valid_moves) != 0:
+            for valid_move in valid_moves:
+                if (valid_move.start_row == r) and (valid_move.start_column == c):
+                    column = (valid_move.end_column * SIZE)
+                    row = (valid_move.end_row * SIZE)
+                    self.display.blit(square, (column, row))
 
+    def animate_move(self, selected_move: object):
         start_column = selected_move.start_column
         start_row = selected_move.start_row
         end_column = selected_move.end_column
         end_row = selected_move.end_row
 
-        # to disable the moved piece, otherwise it's visible twice
-        blank = p.Blank(start_row, start_column)
-        self.board.set_piece(start_row, start_column, blank)
-
         direction_c = end_column - start_column
         direction_r = end_row - start_row
 
-        frames_per_square = 6
-        frame_count = (abs(direction_r) + abs(direction_c)) * frames_per_square
+        frame_count = self.distance(selected_move) * STEPS['animate']
+        frame = frame_count - self.frames
 
-        for frame in range(frame_count + 1):
-            column = (start_column + (direction_c * frame / frame_count))
-            row = (start_row + (direction_r * frame / frame_count))
+        column = (start_column + (direction_c * frame / frame_count))
+        row = (start_row + (direction_r * frame / frame_count))
 
-            self.__draw_board()
-            self.__draw_pieces()
+        # the moved piece is drawn over the captured piece, which stays until the move is played
+        moved_piece = selected_move.moved_piece
+        self.display.blit(IMAGES[moved_piece.load_image()], pygame.Rect(column * SIZE, row * SIZE, SIZE, SIZE))
 
-            end_square = pygame.Rect(end_column * SIZE, end_row * SIZE, SIZE, SIZE)
+    def __draw(self):
+        self.__draw_board()
 
-            captured_piece = selected_move.captured_piece
-            if not isinstance(captured_piece, p.Blank):
-                self.display.blit(IMAGES[captured_piece.load_image()], end_square)
+        if self.step == 'highlight':
+            self.highlight(self.highlighted, (self.move.start_row, self.move.start_column))
+        elif self.selected != ():
+            self.highlight(self.human_moves, self.selected, color=self.selected_color)
 
-            moved_piece = selected_move.moved_piece
-            self.display.blit(IMAGES[moved_piece.load_image()], pygame.Rect(column * SIZE, row * SIZE, SIZE, SIZE))
+        # the moved piece is not drawn on its start square while it is animated
+        hidden = (self.move.start_row, self.move.start_column) if self.step == 'animate' else ()
+        self.__draw_pieces(hidden)
 
-            pygame.display.flip()
-            clock.tick(60)
+        if self.step == 'animate':
+            self.animate_move(self.move)
 
-    def __draw(self):
-        self.__draw_board()
-        self.__draw_pieces()
+        pygame.display.flip()
 
     def __draw_board(self):
         for r in range(8):
@@ -196,13 +305,12 @@ class Game:
                 color: str = 'white' if ((r + c) % 2 == 0) else 'gray'
                 pygame.draw.rect(self.display, COLORS.get(color), pygame.Rect((c * SIZE), (r * SIZE), SIZE, SIZE))
 
-    def __draw_pieces(self):
+    def __draw_pieces(self, hidden: tuple = ()):
         for r in range(8):
             for c in range(8):
                 piece = self.board.get_piece(row=r, column=c)
-                if type(piece) != p.Blank:
+                if type(piece) != p.Blank and (r, c) != hidden:
                     self.display.blit(IMAGES[piece.load_image()], pygame.Rect((c * SIZE), (r * SIZE), SIZE, SIZE))
-        pygame.display.flip()
 
     @staticmethod
     def load_pieces():
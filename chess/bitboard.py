@@ -0,0 +1,401 @@
+from chess.tables import KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, RAYS, BETWEEN, LINE, ORTHOGONAL, DIAGONAL
+from chess.tables import nearest, ray_attacks
+
+
+# the squares are numbered like the board array: square = row * 8 + column
+# square 0 is 'a8' (top left) and square 63 is 'h1' (bottom right)
+WHITE: int = 0
+BLACK: int = 1
+
+PAWN: int = 0
+KNIGHT: int = 1
+BISHOP: int = 2
+ROOK: int = 3
+QUEEN: int = 4
+KING: int = 5
+
+KINDS: dict[str, int] = {'pawn': PAWN, 'knight': KNIGHT, 'bishop': BISHOP, 'rook': ROOK, 'queen': QUEEN, 'king': KING}
+SIDES: dict[str, int] = {'white': WHITE, 'black': BLACK}
+
+FULL: int = (1 << 64) - 1
+FILE_A: int = sum(1 << (r * 8) for r in range(8))
+FILE_H: int = FILE_A << 7
+NOT_A: int = FULL ^ FILE_A
+NOT_H: int = FULL ^ FILE_H
+
+ROW_1: int = 0xFF << 56
+ROW_2: int = 0xFF << 48
+ROW_7: int = 0xFF << 8
+ROW_8: int = 0xFF
+
+# flags of a generated move
+NORMAL: int = 0
+EN_PASSANT: int = 1
+CASTLING: int = 2
+PROMOTION: int = 3
+
+# a move is packed into 16 bits: end (bits 0-5), start (bits 6-11), flag (bits 12-13) and the kind of a promotion
+# minus KNIGHT (bits 14-15), so the lower 12 bits are equal to Move.key()
+QUEEN_PROMOTION: int = (PROMOTION << 12) | ((QUEEN - KNIGHT) << 14)
+
+
+def encode(start: int, end: int, flag: int = NORMAL, promotion: int = QUEEN) -> int:
+    """
+    Packs a move into an integer, the promotion kind is only stored for a promotion.
+    """
+
+    move = end | (start << 6) | (flag << 12)
+
+    if flag == PROMOTION:
+        move |= (promotion - KNIGHT) << 14
+
+    return move
+
+
+def decode(move: int) -> tuple:
+    """
+    Unpacks a move into (start, end, flag, promotion), the promotion kind is 0 if it is not a promotion.
+    """
+
+    flag = (move >> 12) & 3
+    promotion = ((move >> 14) & 3) + KNIGHT if flag == PROMOTION else 0
+
+    return (move >> 6) & 63, move & 63, flag, promotion
+
+
+def squares(bits: int):
+    """
+    Yields the index of every set bit, starting with the lowest one.
+    """
+
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+def popcount(bits: int) -> int:
+    """
+    Returns the number of set bits, int.bit_count is only available since Python 3.10.
+    """
+
+    return bin(bits).count('1')
+
+
+class BitBoard:
+    """
+    The 'BitBoard' is an alternative representation of the chessboard.
+    There is one 64-bit integer for each piece type and color plus one occupancy mask per color.
+    Moves are generated with shift and mask operations instead of walking the board square by square.
+    """
+
+    def __init__(self, board: object = None):
+        self.pieces: list[list[int]] = [[0] * 6, [0] * 6]
+        self.occupancy: list[int] = [0, 0]
+        self.occupied: int = 0
+
+        if board is not None:
+            for square in range(64):
+                self.update_square(square, board.squares[square])
+
+    def copy(self) -> object:
+        """
+        Returns an independent copy of the bitboards.
+        """
+
+        bitboard = BitBoard()
+        bitboard.pieces = [self.pieces[WHITE].copy(), self.pieces[BLACK].copy()]
+        bitboard.occupancy = self.occupancy.copy()
+        bitboard.occupied = self.occupied
+
+        return bitboard
+
+    def update_square(self, square: int, code: int):
+        """
+        Synchronizes a single square with the integer code of the board.
+        """
+
+        bit = 1 << square
+
+        if self.occupied & bit:
+            color = WHITE if self.occupancy[WHITE] & bit else BLACK
+            boards = self.pieces[color]
+            for kind in range(6):
+                if boards[kind] & bit:
+                    boards[kind] ^= bit
+                    break
+            self.occupancy[color] ^= bit
+            self.occupied ^= bit
+
+        if code != 0:
+            color = WHITE if code > 0 else BLACK
+            self.pieces[color][abs(code) - 1] |= bit
+            self.occupancy[color] |= bit
+            self.occupied |= bit
+
+    def attacked(self, square: int, color: int, occupied: int = -1) -> bool:
+        """
+        Returns true or false whether the square is attacked by a piece of the passed color.
+        The test looks outward from the square and stops at the first attacker that is found.
+        An own occupancy can be passed, e.g. without the king, so that sliding pieces can look through it.
+        """
+
+        enemy = self.pieces[color]
+
+        if KNIGHT_ATTACKS[square] & enemy[KNIGHT]:
+            return True
+        if KING_ATTACKS[square] & enemy[KING]:
+            return True
+        # a pawn attacks the square from where a pawn of the other color on this square would attack
+        if PAWN_ATTACKS[color ^ 1][square] & enemy[PAWN]:
+            return True
+
+        if occupied < 0:
+            occupied = self.occupied
+
+        rooks = enemy[ROOK] | enemy[QUEEN]
+        if rooks:
+            for index in ORTHOGONAL:
+                if nearest(RAYS[index][square] & occupied, index) & rooks:
+                    return True
+
+        bishops = enemy[BISHOP] | enemy[QUEEN]
+        if bishops:
+            for index in DIAGONAL:
+                if nearest(RAYS[index][square] & occupied, index) & bishops:
+                    return True
+
+        return False
+
+    def pins_and_checks(self, color: int) -> tuple:
+        """
+        Returns a bitboard of all pinned pieces and a bitboard of all checking pieces of the passed color.
+        """
+
+        own = self.pieces[color]
+        enemy = self.pieces[color ^ 1]
+        king_square = own[KING].bit_length() - 1
+        occupied = self.occupied
+
+        checkers = (KNIGHT_ATTACKS[king_square] & enemy[KNIGHT]) | (PAWN_ATTACKS[color][king_square] & enemy[PAWN])
+        pinned = 0
+
+        rooks = enemy[ROOK] | enemy[QUEEN]
+        bishops = enemy[BISHOP] | enemy[QUEEN]
+
+        for index in range(8):
+            ray = RAYS[index][king_square]
+            sliders = rooks if index < 4 else bishops
+
+            if not ray & sliders:
+                continue
+
+            blockers = ray & occupied
+            first = nearest(blockers, index)
+
+            if first & sliders:
+                checkers |= first
+            elif first & self.occupancy[color]:
+                # the next piece behind an own piece decides whether it is pinned
+                if nearest(blockers ^ first, index) & sliders:
+                    pinned |= first
+
+        return pinned, checkers
+
+    def make(self, color: int, kind: int, start: int, end: int, flag: int) -> tuple:
+        """
+        Executes a move on the bitboards only and returns everything that is needed to take it back.
+        """
+
+        own = self.pieces[color]
+        enemy = self.pieces[color ^ 1]
+        move_bits = (1 << start) | (1 << end)
+        captured = ()
+
+        if flag == EN_PASSANT:
+            target = end + 8 if color == WHITE else end - 8
+            captured = (PAWN, target)
+        elif self.occupancy[color ^ 1] & (1 << end):
+            for enemy_kind in range(6):
+                if enemy[enemy_kind] & (1 << end):
+                    captured = (enemy_kind, end)
+                    break
+
+        if captured:
+            capture_bit = 1 << captured[1]
+            enemy[captured[0]] ^= capture_bit
+            self.occupancy[color ^ 1] ^= capture_bit
+
+        own[kind] ^= move_bits
+        self.occupancy[color] ^= move_bits
+
+        # a pawn reaching the last row becomes a queen
+        promoted = kind == PAWN and (end < 8 or end > 55)
+        if promoted:
+            own[PAWN] ^= 1 << end
+            own[QUEEN] |= 1 << end
+
+        rook_bits = 0
+        if flag == CASTLING:
+            rook_bits = (1 << (end + 1)) | (1 << (end - 2)) if end < start else (1 << (end - 1)) | (1 << (end + 1))
+            own[ROOK] ^= rook_bits
+            self.occupancy[color] ^= rook_bits
+
+        self.occupied = self.occupancy[WHITE] | self.occupancy[BLACK]
+        return captured, promoted, rook_bits
+
+    def unmake(self, color: int, kind: int, start: int, end: int, undo: tuple):
+        """
+        Takes back a move which was executed by make.
+        """
+
+        captured, promoted, rook_bits = undo
+        own = self.pieces[color]
+
+        if promoted:
+            own[QUEEN] ^= 1 << end
+            own[PAWN] |= 1 << end
+
+        move_bits = (1 << start) | (1 << end)
+        own[kind] ^= move_bits
+        self.occupancy[color] ^= move_bits
+
+        if rook_bits:
+            own[ROOK] ^= rook_bits
+            self.occupancy[color] ^= rook_bits
+
+        if captured:
+            capture_bit = 1 << captured[1]
+            self.pieces[color ^ 1][captured[0]] |= capture_bit
+            self.occupancy[color ^ 1] |= capture_bit
+
+        self.occupied = self.occupancy[WHITE] | self.occupancy[BLACK]
+
+    def pseudo_moves(self, color: int, en_passant: int = -1, castling: tuple = (False, False),
+                     captures: bool = True, quiets: bool = True, origins: int = FULL) -> list[int]:
+        """
+        Creates all packed moves (see encode) without testing whether the own king is in check afterwards.
+        A pawn reaching the last row is only promoted to a queen.\n
+        The moves can be generated in two stages: the captures (including en passant and all promotions)
+        and the quiet moves (including castling). Only the pieces on the origins squares are moved.
+        """
+
+        own = self.pieces[color]
+        enemies = self.occupancy[color ^ 1]
+        empty = FULL ^ self.occupied
+        moves: list[int] = []
+
+        # the squares the pieces may move to in the requested stages
+        targets = (enemies if captures else 0) | (empty if quiets else 0)
+
+        # pawns are moved all at once, the start square is derived from the shift
+        pawns = own[PAWN] & origins
+        if color == WHITE:
+            single = (pawns >> 8) & empty
+            double = ((single & (ROW_2 >> 8)) >> 8) & empty
+            shifts = ((single, 8), (double, 16), ((pawns >> 7) & NOT_A & enemies, 7),
+                      ((pawns >> 9) & NOT_H & enemies, 9))
+            last_row = ROW_8
+        else:
+            single = (pawns << 8) & empty
+            double = ((single & (ROW_7 << 8)) << 8) & empty
+            shifts = ((single, -8), (double, -16), ((pawns << 9) & NOT_A & enemies, -9),
+                      ((pawns << 7) & NOT_H & enemies, -7))
+            last_row = ROW_1
+
+        for i, (ends, offset) in enumerate(shifts):
+            # the first two shifts are pushes, a push is only a capture stage move if it promotes
+            if quiets if i < 2 else captures:
+                moves += [end | ((end + offset) << 6) for end in squares(ends & ~last_row)]
+            if captures:
+                moves += [end | ((end + offset) << 6) | QUEEN_PROMOTION for end in squares(ends & last_row)]
+
+        if captures and en_passant >= 0:
+            for start in squares(PAWN_ATTACKS[color ^ 1][en_passant] & pawns):
+                moves.append(en_passant | (start << 6) | (EN_PASSANT << 12))
+
+        for start in squares(own[KNIGHT] & origins):
+            origin = start << 6
+            moves += [end | origin for end in squares(KNIGHT_ATTACKS[start] & targets)]
+
+        occupied = self.occupied
+        for kind, directions in ((BISHOP, DIAGONAL), (ROOK, ORTHOGONAL), (QUEEN, range(8))):
+            for start in squares(own[kind] & origins):
+                attacks = 0
+                for index in directions:
+                    attacks |= ray_attacks(start, occupied, index)
+
+                origin = start << 6
+                moves += [end | origin for end in squares(attacks & targets)]
+
+        for start in squares(own[KING] & origins):
+            origin = start << 6
+            moves += [end | origin for end in squares(KING_ATTACKS[start] & targets)]
+
+            # castling squares must be empty, the attacked squares are tested by legal_moves
+            queen_side, king_side = castling
+            if quiets and queen_side and not (self.occupied & (0b1110 << (start - 4))):
+                moves.append((start - 2) | origin | (CASTLING << 12))
+            if quiets and king_side and not (self.occupied & (0b0110 << start)):
+                moves.append((start + 2) | origin | (CASTLING << 12))
+
+        return moves
+
+    def legal_moves(self, color: int, en_passant: int = -1, castling: tuple = (False, False),
+                    pins_and_checks: tuple = (), moves: list[int] = None,
+                    captures: bool = True, quiets: bool = True, origins: int = FULL) -> list[int]:
+        """
+        Creates all legal packed moves of a color (see encode). A list can be passed to be refilled instead of
+        creating a new one, e.g. one list per ply of a search. The stages and origins are passed to pseudo_moves.\n
+        Pinned pieces may only move on the line through the king, and in check only the squares between the king and
+        the checking piece are allowed. Only king and en passant moves are tested by executing them.
+        """
+
+        enemy = color ^ 1
+        king_square = self.pieces[color][KING].bit_length() - 1
+        pinned, checkers = pins_and_checks if pins_and_checks else self.pins_and_checks(color)
+
+        if moves is None:
+            moves = []
+        else:
+            moves.clear()
+
+        # squares on which a move resolves a check, in double check only the king may move
+        evasions = FULL
+        if checkers:
+            checker = checkers.bit_length() - 1
+            evasions = checkers | BETWEEN[king_square][checker] if checkers == (1 << checker) else 0
+
+        for move in self.pseudo_moves(color, en_passant, castling, captures, quiets, origins):
+            start = (move >> 6) & 63
+            end = move & 63
+            flag = (move >> 12) & 3
+
+            if start != king_square and flag != EN_PASSANT:
+                if (1 << end) & evasions and (not pinned & (1 << start) or (1 << end) & LINE[king_square][start]):
+                    moves.append(move)
+                continue
+
+            if flag == CASTLING:
+                # the king must not castle out of, through or into check
+                step = 1 if end > start else -1
+                if checkers or self.attacked(start + step, enemy) or self.attacked(end, enemy):
+                    continue
+                moves.append(move)
+                continue
+
+            kind = KING if start == king_square else PAWN
+            undo = self.make(color, kind, start, end, flag)
+            if not self.attacked(end if kind == KING else king_square, enemy):
+                moves.append(move)
+            self.unmake(color, kind, start, end, undo)
+
+        return moves
+
+    def in_check(self, color: int) -> bool:
+        """
+        Returns true or false whether the king of the passed color is in check.
+        """
+
+        king = self.pieces[color][KING]
+        return self.attacked(king.bit_length() - 1, color ^ 1)
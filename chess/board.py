@@ -1,79 +1,115 @@
 from chess.player import ComputerizedPlayer
+from chess.players import RandomPlayer
+from chess.position import Position, START_FEN
+from chess.bitboard import SIDES, squares as squares_of
+import chess.bitboard as b
 import chess.pieces as p
-import numpy
+
+
+# the piece classes ordered by their integer code, a negative code is a black piece
+PIECE_CLASSES: list = [p.Pawn, p.Knight, p.Bishop, p.Rook, p.Queen, p.King]
 
 
 class Board:
     """
     Board is an 8×8 set of boxes containing all active chess pieces.
-    This class controls the flow of a game. It keeps track of all the game moves.
+    This class controls the flow of a game. It keeps track of all the game moves.\n
+    The state of the game is kept in a 'Position', the board adds the 'Move' objects and the players.
+    The squares only store small integer codes (square = row * 8 + column). The 'Piece' objects returned by get_piece
+    are created once per board and square and only serve as move generation strategies.
     """
 
-    def __init__(self, players: dict):
+    def __init__(self, players: dict, fen: str = START_FEN):
         self.move_log = []
-        self.white_move = True
-        self.board = numpy.empty((8, 8), dtype=object)
-
-        # [i][0] = white_queen_side_castling, [i][1] = white_king_side_castling
-        # [i][2] = black_queen_side_castling, [i][3] = clack_king_side_castling
-        self.castling_log: list[tuple] = [(True, True, True, True)]
 
         white: object = players.get('1')
         black: object = players.get('2')
+        self.players: tuple = (white, black)
 
-        for r in range(1, 7):
-            for c in range(8):
-                self.board[r][c] = p.Blank(row=r, column=c)
-
-        for c in range(8):
-            self.board[1][c] = p.Pawn(player=black, row=1, column=c)
-            self.board[6][c] = p.Pawn(player=white, row=6, column=c)
-
-        for r in (0, 7):
-            player = white if r == 7 else black
-            self.board[r][0] = p.Rook(player=player, row=r, column=0)
-            self.board[r][1] = p.Knight(player=player, row=r, column=1)
-            self.board[r][2] = p.Bishop(player=player, row=r, column=2)
-            self.board[r][3] = p.Queen(player=player, row=r, column=3)
-            self.board[r][4] = p.King(player=player, row=r, column=4)
-            self.board[r][5] = p.Bishop(player=player, row=r, column=5)
-            self.board[r][6] = p.Knight(player=player, row=r, column=6)
-            self.board[r][7] = p.Rook(player=player, row=r, column=7)
+        self.pieces: list[list[object]] = Board.create_pieces(white, black)
+        self.position = Position(fen)
+
+    @staticmethod
+    def create_pieces(white: object, black: object) -> list[list[object]]:
+        """
+        Creates one piece for each code and square. The list is indexed by [code][square],
+        so a negative code directly returns a black piece.
+        """
+
+        pieces: list[list[object]] = [[p.Blank(row=s // 8, column=s % 8) for s in range(64)]]
+        pieces += [[piece_class(white, s // 8, s % 8) for s in range(64)] for piece_class in PIECE_CLASSES]
+        pieces += [[piece_class(black, s // 8, s % 8) for s in range(64)] for piece_class in reversed(PIECE_CLASSES)]
+
+        return pieces
+
+    def copy(self) -> object:
+        """
+        Returns a copy of the board. The position is copied, the pieces and players are shared.
+        """
+
+        board = Board.__new__(Board)
+        board.move_log = self.move_log.copy()
+        board.players = self.players
+        board.pieces = self.pieces
+        board.position = self.position.copy()
+        board.position.stack = self.position.stack.copy()
+
+        return board
 
     def get_piece(self, row: int, column: int) -> object:
         """
         When row and column are passed, the corresponding piece is returned.
         """
 
-        return self.board[row][column]
+        square = row * 8 + column
+        return self.pieces[self.position.squares[square]][square]
 
-    def set_piece(self, row: int, column: int, piece: object):
+    def piece_list(self, color: int) -> list[object]:
         """
-        When row, column and piece are passed, the position is overwritten with the passed piece.
+        Returns all pieces of the color (chess.bitboard.WHITE or BLACK) ordered by their square.
         """
 
-        self.board[row][column] = piece
+        squares = self.position.squares
+        pieces = self.pieces
+
+        return [pieces[squares[square]][square] for square in squares_of(self.position.bitboard.occupancy[color])]
+
+    def king_position(self, color: str) -> tuple:
+        """
+        Returns the (row, column) of the king of the passed color.
+        """
+
+        return divmod(self.position.king_square(SIDES[color]), 8)
+
+    def square_attacked(self, square: tuple, by_color: str, without: tuple = ()) -> bool:
+        """
+        Returns true or false whether the square (row, column) is attacked by a piece of the passed color.
+        The square 'without' is treated as empty, e.g. the king that wants to move away from it.
+        """
+
+        bitboard = self.position.bitboard
+
+        occupied = -1
+        if without != ():
+            occupied = bitboard.occupied & ~(1 << (without[0] * 8 + without[1]))
+
+        return bitboard.attacked(square[0] * 8 + square[1], SIDES[by_color], occupied)
 
     def move_piece(self, move: object, move_finding: bool = False):
         """
         Executes the move and updates the board and the position of the piece.
-        Set move_finding to true if you call this method by a computerized player.
+        Set move_finding to true if you call this method by a computerized player.\n
+        This is the entry point for 'Move' objects, the move is kept in move_log.
+        A search executes packed moves on the position instead.
         """
 
-        self.board[move.start_row][move.start_column] = p.Blank(move.start_row, move.start_column)
-        self.board[move.end_row][move.end_column] = move.moved_piece
-        move.moved_piece.set_position(move.end_row, move.end_column)
         player = move.moved_piece.player
 
-        # updating the kings position
-        if isinstance(move.moved_piece, p.King):
-            move.moved_piece.player.king_position = (move.end_row, move.end_column)
-
         # pawn promotion
-        if move.is_pawn_promotion:
+        if move.is_pawn_promotion and move.promotion == 0:
             # TODO: detect which promotion is the best [Knight or Queen]
             if isinstance(player, ComputerizedPlayer) or move_finding:
-                self.board[move.end_row][move.end_column] = p.Queen(player, move.end_row, move.end_column)
+                move.promotion = b.QUEEN
             else:
                 entry = None
 
@@ -81,32 +117,9 @@ class Board:
                 while entry not in ['N', 'B', 'R', 'Q']:
                     entry = input('Enter Pawn Promotion [N, B, R, Q]: ').upper()
 
-                if entry == 'N':
-                    self.board[move.end_row][move.end_column] = p.Knight(player, move.end_row, move.end_column)
-                elif entry == 'B':
-                    self.board[move.end_row][move.end_column] = p.Bishop(player, move.end_row, move.end_column)
-                elif entry == 'R':
-                    self.board[move.end_row][move.end_column] = p.Rook(player, move.end_row, move.end_column)
-                elif entry == 'Q':
-                    self.board[move.end_row][move.end_column] = p.Queen(player, move.end_row, move.end_column)
-
-        # update player.en_passant on 2 square pawn moves
-        if isinstance(move.moved_piece, p.Pawn) and abs(move.start_row - move.end_row):
-            player.en_passant = ((move.start_row + move.end_row) // 2, move.end_column)
-        else:
-            player.en_passant = ()
+                move.promotion = {'N': b.KNIGHT, 'B': b.BISHOP, 'R': b.ROOK, 'Q': b.QUEEN}[entry]
 
-        # en passant move
-        if move.is_en_passant:
-            self.board[move.start_row][move.end_column] = p.Blank(move.start_row, move.end_column)
-
-        # castling move
-        self.castling_move(move)
-
-        # update castling rights
-        self.update_castling(move, player)
-
-        self.white_move = not self.white_move
+        self.position.make_move(move.pack())
         self.move_log.append(move)
 
     def undo_move(self) -> bool:
@@ -115,25 +128,8 @@ class Board:
         """
 
         if len(self.move_log) != 0:
-            move = self.move_log.pop()
-            self.board[move.start_row][move.start_column] = move.moved_piece
-            self.board[move.end_row][move.end_column] = move.captured_piece
-            move.moved_piece.set_position(move.start_row, move.start_column)
-            if isinstance(move.moved_piece, p.King):
-                move.moved_piece.player.king_position = (move.start_row, move.start_column)
-            self.white_move = not self.white_move
-
-            # resets the captured pawn
-            if move.is_en_passant:
-                enemy = move.moved_piece.player.enemy
-                pawn = p.Pawn(enemy, move.start_row, move.end_column)
-                self.board[move.start_row][move.end_column] = pawn
-
-            # castling move
-            self.castling_move(move)
-
-            # reset castling rights
-            self.reset_castling(move)
+            self.move_log.pop()
+            self.position.unmake_move()
 
             return True
 
@@ -141,68 +137,6 @@ class Board:
         else:
             return False
 
-    def update_castling(self, move: object, player: object):
-        """
-        If the movement is from a 'Rook' or a 'King', a new castling_log' is created.
-        """
-
-        white_queen_side = self.castling_log[-1][0]
-        white_king_side = self.castling_log[-1][1]
-        black_queen_side = self.castling_log[-1][2]
-        black_king_side = self.castling_log[-1][3]
-
-        if isinstance(move.moved_piece, p.King):
-            if player.color == 'white':
-                white_queen_side = False
-                white_king_side = False
-            elif player.color == 'black':
-                black_queen_side = False
-                black_king_side = False
-
-            self.castling_log.append((white_queen_side, white_king_side, black_queen_side, black_king_side))
-        elif isinstance(move.moved_piece, p.Rook):
-            # disable queen side castling if left rook has moved
-            if move.start_column == 0:
-                if player.color == 'white':
-                    white_queen_side = False
-                elif player.color == 'black':
-                    black_queen_side = False
-
-            # disable king side castling if right rook has moved
-            elif move.start_column == 7:
-                if player.color == 'white':
-                    white_king_side = False
-                elif player.color == 'black':
-                    black_king_side = False
-
-            self.castling_log.append((white_queen_side, white_king_side, black_queen_side, black_king_side))
-
-    def reset_castling(self, move: object):
-        """
-        If the last move was from a 'Rook' or a 'King', the last 'castling_log' is removed.
-        """
-
-        if isinstance(move.moved_piece, p.King) or isinstance(move.moved_piece, p.Rook):
-            self.castling_log.pop()
-
-    def castling_move(self, move: object):
-        """
-        Checks if it is castling and executes or resets the 'Rook' move.
-        """
-
-        if move.castle_move:
-            # queen side castling move
-            if (move.start_column - move.end_column) == 2:
-                # swapping the rook with the blank piece
-                self.board[move.end_row][0], self.board[move.end_row][move.end_column + 1] = \
-                    self.board[move.end_row][move.end_column + 1], self.board[move.end_row][0]
-
-            # king side castling move
-            elif (move.start_column - move.end_column) == -2:
-                # swapping the rook with the blank piece
-                self.board[move.end_row][7], self.board[move.end_row][move.end_column - 1] = \
-                    self.board[move.end_row][move.end_column - 1], self.board[move.end_row][7]
-
     def print_console(self):
         """
         Outputs the current board on the console.
@@ -210,5 +144,18 @@ class Board:
 
         for r in range(8):
             for c in range(8):
-                print(self.board[r][c], end=' ')
+                print(self.get_piece(r, c), end=' ')
             print()
+
+
+def create_board(fen: str = START_FEN) -> Board:
+    """
+    Creates a board of the FEN with two random players, it is only needed to name the moves.
+    """
+
+    players = {'1': RandomPlayer(color='white'), '2': RandomPlayer(color='black')}
+    board = Board(players, fen)
+    players.get('1').set_enemy(board)
+    players.get('2').set_enemy(board)
+
+    return board
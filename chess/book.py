@@ -0,0 +1,211 @@
+from chess.epd import read_epd, SAN_MARKS
+from chess.board import create_board
+from chess.position import Position
+from chess.bitboard import KNIGHT, PROMOTION
+from chess.move import Move
+from random import Random
+import argparse
+import mmap
+import os
+import re
+import struct
+
+
+# an entry is the zobrist hash of the position, the packed move and its weight (how often it was played),
+# the entries of a book are sorted by the hash, so the moves of a position are found by bisection
+ENTRY: struct.Struct = struct.Struct('>QHH')
+
+# the letters of the promotion kinds knight, bishop, rook and queen
+PROMOTION_LETTERS: str = 'NBRQ'
+
+# comments, variations, annotations, move numbers and results of the PGN move text
+PGN_NOISE: re.Pattern = re.compile(r'\{[^}]*\}|;[^\n]*|\$\d+|\d+\.+|1-0|0-1|1/2-1/2|\*')
+
+
+class OpeningBook:
+    """
+    An 'OpeningBook' looks up the moves of a position in a book file of chess.book.build.
+    The file is mapped into memory, so only the few pages touched by the bisection are ever read.
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, 'rb')
+
+        # an empty file cannot be mapped, it is the book of sources without moves which has no entries
+        size = os.fstat(self.file.fileno()).st_size
+        self.memory = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size != 0 else None
+        self.length: int = size // ENTRY.size
+
+    def find(self, key: int) -> list[tuple]:
+        """
+        Returns the (move, weight) of all entries of the zobrist hash ordered by their weight.
+        """
+
+        memory = self.memory
+        low, high = 0, self.length
+
+        # the first entry whose hash is not smaller than the key
+        while low < high:
+            middle = (low + high) // 2
+            if ENTRY.unpack_from(memory, middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        entries: list[tuple] = []
+        while low < self.length:
+            entry_key, move, weight = ENTRY.unpack_from(memory, low * ENTRY.size)
+            if entry_key != key:
+                break
+
+            entries.append((move, weight))
+            low += 1
+
+        return entries
+
+    def choose(self, position: object, random: Random = None) -> int:
+        """
+        Returns a packed book move of the position or -1 if the position is not in the book.
+        The move with the highest weight is returned, or a move chosen by its weight if a random generator is passed.
+        """
+
+        entries: list[tuple] = []
+
+        # another position with the same hash could be stored, so only legal moves are used
+        for (move, weight) in self.find(position.hash):
+            origin = 1 << ((move >> 6) & 63)
+            moves = [legal & 0x3FFF for legal in position.legal_moves(origins=origin)]
+            if (move & 0x3FFF) in moves:
+                entries.append((move, weight))
+
+        if len(entries) == 0:
+            return -1
+
+        if random is None:
+            return entries[0][0]
+
+        return random.choices([move for (move, _) in entries], [weight for (_, weight) in entries])[0]
+
+    def close(self):
+        """
+        Unmaps the book and closes its file.
+        """
+
+        if self.memory is not None:
+            self.memory.close()
+        self.file.close()
+
+
+def parse_san(board: object, san: str) -> int:
+    """
+    Returns the packed move of the SAN (e.g. 'Nbd2', 'exd5+', 'e8=N' or 'O-O') in the position of the board.
+    """
+
+    san = san.rstrip(SAN_MARKS).replace('0', 'O')
+    kind = None
+
+    # the moves of a pawn promotion are generated once and compared as queen promotions
+    if '=' in san:
+        san, letter = san.split('=')
+        kind = PROMOTION_LETTERS.index(letter[0].upper()) + KNIGHT
+        san += '=Q'
+
+    moves = [Move.unpack(move, board) for move in board.position.legal_moves()]
+    for move in moves:
+        if move.san(moves) == san:
+            packed = move.pack()
+            if kind is not None and (packed >> 12) & 3 == PROMOTION:
+                packed = (packed & 0x3FFF) | ((kind - KNIGHT) << 14)
+
+            return packed
+
+    raise Exception(f"Illegal move '{san}' in position '{board.position.fen()}'")
+
+
+def read_pgn(path: str):
+    """
+    Yields the SAN moves of each game of a PGN file, the games are read one after another.
+    """
+
+    with open(path) as file:
+        text: list[str] = []
+
+        for line in file:
+            line = line.strip()
+
+            # a tag starts a new game after the move text of the previous one
+            if line.startswith('['):
+                if text:
+                    yield split_moves(' '.join(text))
+                    text = []
+            elif line != '':
+                text.append(line)
+
+        if text:
+            yield split_moves(' '.join(text))
+
+
+def split_moves(text: str) -> list[str]:
+    """
+    Removes comments, variations, annotations, move numbers and the result of a PGN move text
+    and returns the SAN moves.
+    """
+
+    # variations can be nested, so the innermost ones are removed first
+    while '(' in text:
+        text = re.sub(r'\([^()]*\)', ' ', text)
+
+    return PGN_NOISE.sub(' ', text).split()
+
+
+def build(sources: list[str], path: str, plies: int = 16) -> int:
+    """
+    Compiles the PGN and EPD files to a book. The first plies of each game are counted, the best moves ('bm')
+    of an EPD position are counted once. Returns the number of entries.
+    """
+
+    weights: dict[tuple, int] = {}
+
+    def count(key: int, move: int):
+        weights[(key, move)] = weights.get((key, move), 0) + 1
+
+    for source in sources:
+        if source.endswith('.epd'):
+            for (fen, operations) in read_epd(source):
+                board = create_board(fen)
+                for san in operations.get('bm', []):
+                    count(board.position.hash, parse_san(board, san))
+            continue
+
+        for game in read_pgn(source):
+            board = create_board()
+            position: Position = board.position
+
+            for san in game[:plies]:
+                move = parse_san(board, san)
+                count(position.hash, move)
+                position.make_move(move)
+
+    # the moves of a position follow each other, the most played move first
+    entries = sorted(weights.items(), key=lambda item: (item[0][0], - item[1]))
+
+    with open(path, 'wb') as file:
+        for ((key, move), weight) in entries:
+            file.write(ENTRY.pack(key, move, min(weight, 0xFFFF)))
+
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compiles an opening book from PGN and EPD files.')
+    parser.add_argument('book', help='the book file to write')
+    parser.add_argument('sources', nargs='+', help='the PGN (.pgn) and EPD (.epd) files')
+    parser.add_argument('--plies', type=int, default=16, help='the number of half moves of a game to add')
+    arguments = parser.parse_args()
+
+    entries = build(arguments.sources, arguments.book, arguments.plies)
+    print(f'{entries} entries written to {arguments.book}')
+
+
+if __name__ == '__main__':
+    main()
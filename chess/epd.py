@@ -0,0 +1,166 @@
+from chess.players import MiniMaxPlayer, NegaScoutPlayer
+from chess.board import Board
+from chess.move import Move
+from time import perf_counter
+import argparse
+
+
+# the players which can search the positions of a test suite
+ENGINES: dict = {'negascout': NegaScoutPlayer, 'minimax': MiniMaxPlayer}
+
+# the check and annotation marks are not part of the move itself
+SAN_MARKS: str = '+#!?'
+
+
+def parse_epd(line: str) -> tuple:
+    """
+    Splits an EPD line into the FEN of the position and its operations,
+    e.g. 'r1b1k2r/... w KQkq - bm Qd1+; id "WAC.001";' returns (fen, {'bm': ['Qd1+'], 'id': ['WAC.001']}).
+    """
+
+    fields: list[str] = line.split(maxsplit=4)
+
+    if len(fields) < 4:
+        raise Exception(f"EPD must contain at least 4 fields but contains {len(fields)}: '{line}'")
+
+    operations: dict[str, list[str]] = {}
+
+    for operation in (fields[4] if len(fields) > 4 else '').split(';'):
+        words = operation.split(maxsplit=1)
+        if len(words) == 0:
+            continue
+
+        operands = words[1] if len(words) > 1 else ''
+        if operands.startswith('"'):
+            operations[words[0]] = [operands.strip('"')]
+        else:
+            operations[words[0]] = operands.split()
+
+    return ' '.join(fields[0:4]), operations
+
+
+def read_epd(path: str):
+    """
+    Yields the (fen, operations) of an EPD file line by line, so a large test suite is never loaded completely.
+    Empty lines and comments starting with '#' are skipped.
+    """
+
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+
+            if line != '' and not line.startswith('#'):
+                yield parse_epd(line)
+
+
+def create_board(fen: str, engine: type, max_depth: int, movetime: float) -> tuple:
+    """
+    Creates a board of the FEN where both players are engines. Returns the board and the player to move.
+    """
+
+    players = {'1': engine(color='white', max_depth=max_depth, movetime=movetime),
+               '2': engine(color='black', max_depth=max_depth, movetime=movetime)}
+    board = Board(players, fen)
+    players.get('1').set_enemy(board)
+    players.get('2').set_enemy(board)
+
+    return board, board.players[0] if board.position.white_move else board.players[1]
+
+
+def solves(san: str, operations: dict) -> bool:
+    """
+    Returns true or false whether the move is one of the best moves (bm) and none of the moves to avoid (am).
+    """
+
+    best = [move.rstrip(SAN_MARKS) for move in operations.get('bm', [])]
+    avoid = [move.rstrip(SAN_MARKS) for move in operations.get('am', [])]
+
+    return (len(best) == 0 or san in best) and san not in avoid
+
+
+def solve(fen: str, operations: dict, engine: type = NegaScoutPlayer, max_depth: int = 64,
+          movetime: float = None) -> dict:
+    """
+    Searches one position and returns its result. The time to solution is the time of the first depth after which
+    the best move always solved the position, or None if the position was not solved.
+    """
+
+    board, player = create_board(fen, engine, max_depth, movetime)
+    moves = player.legal_moves(board)
+
+    start = perf_counter()
+    move = player.best_move(board)
+    elapsed = perf_counter() - start
+
+    san = move.san(moves) if move is not None else '-'
+    solved = move is not None and solves(san, operations)
+
+    # a fixed depth search without iterative deepening has only one depth
+    packed = move.pack() if move is not None else -1
+    depth_log = player.depth_log if player.depth_log else [(max_depth, packed, elapsed)]
+    solution_time = None
+
+    if solved:
+        for (depth, depth_move, seconds) in reversed(depth_log):
+            if depth_move == -1 or not solves(Move.unpack(depth_move, board).san(moves), operations):
+                break
+            solution_time = seconds
+
+    return {'id': operations.get('id', [fen])[0], 'move': san, 'expected': operations.get('bm', []),
+            'solved': solved, 'time': elapsed, 'solution_time': solution_time,
+            'depth': depth_log[-1][0], 'nodes': player.nodes}
+
+
+def run(path: str, engine: type = NegaScoutPlayer, max_depth: int = 64, movetime: float = None,
+        limit: int = 0) -> list[dict]:
+    """
+    Searches the positions of an EPD file one after another and prints the result of each position
+    and the solve rate, the mean time to solution and the nodes per second of the whole test suite.
+    """
+
+    results: list[dict] = []
+
+    for (fen, operations) in read_epd(path):
+        result = solve(fen, operations, engine, max_depth, movetime)
+        results.append(result)
+
+        status = f'solved in {result["solution_time"]:.2f} s' if result['solved'] else 'FAILED'
+        print(f'{result["id"]:<16} {result["move"]:<8} expected {" ".join(result["expected"]) or "-":<12} '
+              f'depth {result["depth"]:>2}  {result["nodes"]:>9} nodes  {result["time"]:7.2f} s  {status}')
+
+        if len(results) == limit:
+            break
+
+    solved = [result for result in results if result['solved']]
+    nodes = sum(result['nodes'] for result in results)
+    seconds = sum(result['time'] for result in results)
+
+    if len(results) != 0:
+        mean_time = sum(result['solution_time'] for result in solved) / len(solved) if solved else 0.0
+        print(f'solved {len(solved)} of {len(results)} ({100 * len(solved) / len(results):.1f} %), '
+              f'mean time to solution {mean_time:.2f} s, {nodes} nodes in {seconds:.2f} s, '
+              f'{nodes / max(seconds, 1e-9):.0f} nodes/s')
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Searches the positions of an EPD test suite.')
+    parser.add_argument('path', help='the EPD file, one position per line')
+    parser.add_argument('--engine', choices=ENGINES.keys(), default='negascout', help='the searching player')
+    parser.add_argument('--depth', type=int, default=None, help='the maximal depth of each search')
+    parser.add_argument('--movetime', type=float, default=None, help='the seconds to search each position')
+    parser.add_argument('--limit', type=int, default=0, help='the number of positions, all if missing')
+    arguments = parser.parse_args()
+
+    # without any limit each position is searched for a few seconds
+    movetime = arguments.movetime
+    if arguments.depth is None and movetime is None:
+        movetime = 5.0
+
+    max_depth = arguments.depth if arguments.depth is not None else 64
+    run(arguments.path, ENGINES[arguments.engine], max_depth, movetime, arguments.limit)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+import numpy as np
+
+# all scores are in centipawns from the view of white and all tables are indexed by square = row * 8 + column
+
+# the values of pawn, knight, bishop, rook, queen and king in the middlegame and in the endgame
+MG_VALUES: list[int] = [100, 320, 330, 500, 900, 0]
+EG_VALUES: list[int] = [120, 300, 330, 520, 920, 0]
+
+# the phase is 24 with all pieces on the board and 0 if only kings and pawns are left
+PHASE_VALUES: list[int] = [0, 1, 1, 2, 4, 0]
+MAX_PHASE: int = 24
+
+# the piece-square tables of white, the first row is the 8th rank (black mirrors the rows)
+PAWN_TABLE: list[int] = [
+    0, 0, 0, 0, 0, 0, 0, 0,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    10, 10, 20, 30, 30, 20, 10, 10,
+    5, 5, 10, 25, 25, 10, 5, 5,
+    0, 0, 0, 20, 20, 0, 0, 0,
+    5, -5, -10, 0, 0, -10, -5, 5,
+    5, 10, 10, -20, -20, 10, 10, 5,
+    0, 0, 0, 0, 0, 0, 0, 0]
+
+# in the endgame every step towards the promotion counts
+PAWN_END_TABLE: list[int] = [bonus for bonus in (0, 80, 50, 30, 15, 5, 0, 0) for _ in range(8)]
+
+KNIGHT_TABLE: list[int] = [
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20, 0, 0, 0, 0, -20, -40,
+    -30, 0, 10, 15, 15, 10, 0, -30,
+    -30, 5, 15, 20, 20, 15, 5, -30,
+    -30, 0, 15, 20, 20, 15, 0, -30,
+    -30, 5, 10, 15, 15, 10, 5, -30,
+    -40, -20, 0, 5, 5, 0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50]
+
+BISHOP_TABLE: list[int] = [
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 10, 10, 5, 0, -10,
+    -10, 5, 5, 10, 10, 5, 5, -10,
+    -10, 0, 10, 10, 10, 10, 0, -10,
+    -10, 10, 10, 10, 10, 10, 10, -10,
+    -10, 5, 0, 0, 0, 0, 5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20]
+
+ROOK_TABLE: list[int] = [
+    0, 0, 0, 0, 0, 0, 0, 0,
+    5, 10, 10, 10, 10, 10, 10, 5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    0, 0, 0, 5, 5, 0, 0, 0]
+
+QUEEN_TABLE: list[int] = [
+    -20, -10, -10, -5, -5, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 5, 5, 5, 0, -10,
+    -5, 0, 5, 5, 5, 5, 0, -5,
+    0, 0, 5, 5, 5, 5, 0, -5,
+    -10, 5, 5, 5, 5, 5, 0, -10,
+    -10, 0, 5, 0, 0, 0, 0, -10,
+    -20, -10, -10, -5, -5, -10, -10, -20]
+
+# in the middlegame the king hides behind his pawns, in the endgame he belongs to the center
+KING_TABLE: list[int] = [
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+    20, 20, 0, 0, 0, 0, 20, 20,
+    20, 30, 10, 0, 0, 10, 30, 20]
+
+KING_END_TABLE: list[int] = [
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10, 0, 0, -10, -20, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -30, 0, 0, 0, 0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50]
+
+MG_TABLES: list[list[int]] = [PAWN_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_TABLE]
+EG_TABLES: list[list[int]] = [PAWN_END_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_END_TABLE]
+
+
+def create_scores(values: list[int], tables: list[list[int]]) -> list[list[int]]:
+    """
+    Adds the values to the tables. The list is indexed by [code][square], so a negative code directly returns the
+    scores of a black piece, which are mirrored and negated. Code 0 (empty) scores nothing.
+    """
+
+    white = [[value + table[square] for square in range(64)] for value, table in zip(values, tables)]
+    black = [[- scores[square ^ 56] for square in range(64)] for scores in white]
+
+    return [[0] * 64] + white + list(reversed(black))
+
+
+MG_SCORES: list[list[int]] = create_scores(MG_VALUES, MG_TABLES)
+EG_SCORES: list[list[int]] = create_scores(EG_VALUES, EG_TABLES)
+
+# [code], a negative code returns the phase of a black piece
+PHASES: list[int] = [0] + PHASE_VALUES + list(reversed(PHASE_VALUES))
+
+# the same tables as arrays for evaluate_batch, NumPy also returns the last rows for negative codes
+MG_ARRAY: np.ndarray = np.array(MG_SCORES, dtype=np.int32)
+EG_ARRAY: np.ndarray = np.array(EG_SCORES, dtype=np.int32)
+PHASE_ARRAY: np.ndarray = np.array(PHASES, dtype=np.int32)
+SQUARES: np.ndarray = np.arange(64)
+
+
+def evaluate_squares(squares) -> tuple:
+    """
+    Calculates the accumulators (middlegame, endgame, phase) of the codes from scratch.
+    During a game they are updated incrementally by the board.
+    """
+
+    mg, eg, phase = 0, 0, 0
+
+    for square, code in enumerate(squares):
+        mg += MG_SCORES[code][square]
+        eg += EG_SCORES[code][square]
+        phase += PHASES[code]
+
+    return mg, eg, phase
+
+
+def taper(mg: int, eg: int, phase: int) -> int:
+    """
+    Blends the middlegame and the endgame score by the phase of the game.
+    """
+
+    phase = min(phase, MAX_PHASE)
+    return (mg * phase + eg * (MAX_PHASE - phase)) // MAX_PHASE
+
+
+def stack_squares(rows: list[bytes]) -> np.ndarray:
+    """
+    Stacks the codes of N positions (e.g. position.squares.tobytes()) into an (N, 8, 8) int8 array.
+    """
+
+    return np.frombuffer(b''.join(rows), dtype=np.int8).reshape(len(rows), 8, 8)
+
+
+def evaluate_batch(codes: np.ndarray) -> np.ndarray:
+    """
+    Calculates the tapered scores of N positions from an (N, 8, 8) array of codes at once.
+    Returns N scores, which are equal to the scores of the accumulators of each position.
+    """
+
+    codes = codes.reshape(len(codes), 64).astype(np.intp)
+
+    # the codes select the rows and the squares the columns of the tables
+    mg = MG_ARRAY[codes, SQUARES].sum(axis=1)
+    eg = EG_ARRAY[codes, SQUARES].sum(axis=1)
+    phase = np.minimum(PHASE_ARRAY[codes].sum(axis=1), MAX_PHASE)
+
+    return (mg * phase + eg * (MAX_PHASE - phase)) // MAX_PHASE
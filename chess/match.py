@@ -0,0 +1,271 @@
+from chess.players import RandomPlayer, GreedyPlayer, MiniMaxIterativePlayer, MiniMaxPlayer, NegaScoutPlayer
+from chess.bitboard import WHITE, BLACK, KNIGHT, BISHOP, popcount
+from chess.board import Board
+from chess.move import Move
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+from os import cpu_count
+import argparse
+import json
+import random
+import sys
+
+
+# the players of a match by the name of their specification, e.g. 'minimax:max_depth=2,movetime=0.1'
+PLAYERS: dict[str, type] = {'random': RandomPlayer, 'greedy': GreedyPlayer, 'iterative': MiniMaxIterativePlayer,
+                            'minimax': MiniMaxPlayer, 'negascout': NegaScoutPlayer}
+
+# the results of a game from the view of white
+RESULTS: dict[int, str] = {1: '1-0', 0: '1/2-1/2', -1: '0-1'}
+
+
+def create_player(specification: str, color: str) -> object:
+    """
+    Creates the player of a specification 'name' or 'name:key=value,...', the values are passed to the constructor.
+    """
+
+    name, _, options = specification.partition(':')
+    if name not in PLAYERS:
+        raise Exception(f"Unknown player '{name}', known players are {', '.join(PLAYERS)}")
+
+    arguments: dict = {}
+    for option in filter(None, options.split(',')):
+        key, _, value = option.partition('=')
+        arguments[key] = json.loads(value)
+
+    return PLAYERS[name](color=color, **arguments)
+
+
+def create_board(white: str, black: str) -> Board:
+    """
+    Creates a board in the start position with the players of both specifications.
+    """
+
+    players = {'1': create_player(white, 'white'), '2': create_player(black, 'black')}
+    board = Board(players)
+    players.get('1').set_enemy(board)
+    players.get('2').set_enemy(board)
+
+    return board
+
+
+def insufficient_material(position: object) -> bool:
+    """
+    Returns true or false whether no side can checkmate anymore, i.e. only the kings and at most one minor piece.
+    """
+
+    bitboard = position.bitboard
+    if popcount(bitboard.occupied) > 3:
+        return False
+
+    minors = [bitboard.pieces[side][kind] for side in (WHITE, BLACK) for kind in (KNIGHT, BISHOP)]
+    return popcount(bitboard.occupied) == 2 or any(minors)
+
+
+def adjudicate(position: object, repetitions: dict[int, int], max_plies: int, plies: int) -> tuple:
+    """
+    Returns the (result, reason) of a finished game or None if the game goes on. The result is from the view of
+    white. Three repetitions, 50 moves without capture or pawn move, insufficient material and max_plies are draws.
+    """
+
+    if len(position.legal_moves()) == 0:
+        if position.in_check():
+            return (-1 if position.white_move else 1), 'checkmate'
+        return 0, 'stalemate'
+
+    if repetitions[position.hash] >= 3:
+        return 0, 'repetition'
+    if position.halfmove >= 100:
+        return 0, 'fifty moves'
+    if insufficient_material(position):
+        return 0, 'material'
+    if plies >= max_plies:
+        return 0, 'length'
+
+    return None
+
+
+def random_opening(board: Board, plies: int, generator: random.Random) -> list[str]:
+    """
+    Plays random legal moves on the board and returns their names. An opening that ends the game is played again.
+    """
+
+    position = board.position
+
+    while True:
+        opening: list[str] = []
+
+        for _ in range(plies):
+            moves = position.legal_moves()
+            if len(moves) == 0:
+                break
+
+            move = generator.choice(moves)
+            opening.append(str(Move.unpack(move, board)))
+            position.make_move(move)
+
+        if len(position.legal_moves()) != 0:
+            return opening
+
+        while len(position.stack) != 0:
+            position.unmake_move()
+
+
+def play_game(number: int, white: str, black: str, seed: int, opening_plies: int, max_plies: int) -> dict:
+    """
+    Plays one game between the players of both specifications and returns its record. Both colors of a pairing
+    play the same random opening, because the opening only depends on the seed.\n
+    The record holds the nodes and the seconds of the moves of each color, the nodes are None for a player
+    which does not count them.
+    """
+
+    start = perf_counter()
+    random.seed(f'{seed}-{number}')
+
+    board = create_board(white, black)
+    position = board.position
+
+    # [color] the searched nodes and the seconds of the moves of each player
+    nodes: list[int] = [0, 0]
+    seconds: list[float] = [0.0, 0.0]
+
+    # the table files and process pools of the players are closed, even if the game fails
+    try:
+        opening = random_opening(board, opening_plies, random.Random(seed))
+
+        # every position of the game counts for a repetition, the stack holds the hash before each move of the opening
+        repetitions: dict[int, int] = {}
+        for key in [entry[4] for entry in position.stack] + [position.hash]:
+            repetitions[key] = repetitions.get(key, 0) + 1
+
+        plies = len(opening)
+
+        while (outcome := adjudicate(position, repetitions, max_plies, plies)) is None:
+            color = 0 if position.white_move else 1
+            player = board.players[color]
+
+            move_start = perf_counter()
+            move = player.best_move(board)
+            seconds[color] += perf_counter() - move_start
+
+            if move is None:
+                raise Exception(f"{player.name} found no move in position '{position.fen()}'")
+
+            nodes[color] += getattr(player, 'nodes', 0)
+            board.move_piece(move)
+            repetitions[position.hash] = repetitions.get(position.hash, 0) + 1
+            plies += 1
+    finally:
+        for player in board.players:
+            if hasattr(player, 'close'):
+                player.close()
+
+    counted = [nodes[color] if hasattr(board.players[color], 'nodes') else None for color in (0, 1)]
+
+    result, reason = outcome
+    return {'game': number, 'white': white, 'black': black, 'opening': opening, 'result': RESULTS[result],
+            'reason': reason, 'plies': plies, 'nodes': {'white': counted[0], 'black': counted[1]},
+            'search_seconds': {'white': round(seconds[0], 3), 'black': round(seconds[1], 3)},
+            'seconds': round(perf_counter() - start, 3), 'fen': position.fen()}
+
+
+def schedule(pairings: list[tuple], games: int, seed: int) -> list[tuple]:
+    """
+    Returns the (number, pairing, white, black, seed) of every game. Each opening is played twice per pairing with
+    the colors swapped, so neither player profits from a lopsided random opening. The seeds of a pairing are
+    its own, so with an odd number of games the last opening is only played once.
+    """
+
+    tasks: list[tuple] = []
+
+    for pairing, (first, second) in enumerate(pairings):
+        for game in range(games):
+            players = (first, second) if game % 2 == 0 else (second, first)
+            tasks.append((len(tasks), pairing, players[0], players[1], seed + pairing * games + game // 2))
+
+    return tasks
+
+
+def run(pairings: list[tuple], games: int, workers: int, output: object, seed: int = 0, opening_plies: int = 8,
+        max_plies: int = 400) -> dict:
+    """
+    Plays the games of all pairings in a pool of processes and writes each record as a JSON line to the output
+    as soon as it is finished. The last line is the summary with the score of each pairing,
+    the games per second and the nodes per second of every player which counts its nodes. Returns the summary.
+    """
+
+    start = perf_counter()
+    tasks = schedule(pairings, games, seed)
+
+    # [pairing] [wins, draws, losses] of the first player of the pairing
+    scores: list[list[int]] = [[0, 0, 0] for _ in pairings]
+    pairing_of: dict[int, int] = {number: pairing for (number, pairing, _, _, _) in tasks}
+
+    # [specification] [nodes, seconds] of the moves of the players which count their nodes
+    searches: dict[str, list] = {}
+
+    def record(game: dict):
+        for color in ('white', 'black'):
+            if game['nodes'][color] is not None:
+                search = searches.setdefault(game[color], [0, 0.0])
+                search[0] += game['nodes'][color]
+                search[1] += game['search_seconds'][color]
+
+        pairing = pairing_of[game['game']]
+        result = {'1-0': 1, '0-1': -1}.get(game['result'], 0) * (1 if game['white'] == pairings[pairing][0] else -1)
+        scores[pairing][1 - result] += 1
+
+        output.write(json.dumps(game) + '\n')
+        output.flush()
+
+    arguments = [(number, white, black, game_seed, opening_plies, max_plies)
+                 for (number, _, white, black, game_seed) in tasks]
+
+    if workers == 1:
+        for each in arguments:
+            record(play_game(*each))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for future in as_completed([pool.submit(play_game, *each) for each in arguments]):
+                record(future.result())
+
+    seconds = perf_counter() - start
+    summary = {'summary': {f'{first} vs {second}': {'wins': wins, 'draws': draws, 'losses': losses,
+                                                    'score': (wins + draws / 2) / max(wins + draws + losses, 1)}
+                           for ((first, second), (wins, draws, losses)) in zip(pairings, scores)},
+               'games': len(tasks), 'seconds': round(seconds, 3), 'games_per_second': round(len(tasks) / seconds, 3),
+               'players': {specification: {'nodes': nodes, 'seconds': round(search_seconds, 3),
+                                           'nodes_per_second': round(nodes / max(search_seconds, 1e-9))}
+                           for (specification, (nodes, search_seconds)) in searches.items()}}
+
+    output.write(json.dumps(summary) + '\n')
+    output.flush()
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays headless matches between computerized players.')
+    parser.add_argument('--pair', nargs=2, action='append', metavar=('FIRST', 'SECOND'),
+                        help=f"two players, e.g. 'minimax:max_depth=2' random, known players are {', '.join(PLAYERS)}")
+    parser.add_argument('--games', type=int, default=100, help='the number of games per pairing')
+    parser.add_argument('--workers', type=int, default=cpu_count(), help='the number of processes')
+    parser.add_argument('--opening-plies', type=int, default=8, help='the number of random half moves to start with')
+    parser.add_argument('--max-plies', type=int, default=400, help='the number of half moves until a draw')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the random openings')
+    parser.add_argument('--output', help='the JSON lines file to write, otherwise the records are printed')
+    arguments = parser.parse_args()
+
+    pairings = [tuple(pair) for pair in (arguments.pair or [('minimax:max_depth=2', 'random')])]
+    output = open(arguments.output, 'w') if arguments.output else sys.stdout
+
+    try:
+        run(pairings, arguments.games, arguments.workers, output, arguments.seed, arguments.opening_plies,
+            arguments.max_plies)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
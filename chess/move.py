@@ -1,3 +1,4 @@
+import chess.bitboard as b
 import chess.pieces as p
 
 
@@ -6,7 +7,8 @@ class Move:
     The Move class generates valid moves.
     """
 
-    def __init__(self, start: tuple, end: tuple, board: object, en_passant: bool = False, castle_move: bool = False):
+    def __init__(self, start: tuple, end: tuple, board: object, en_passant: bool = False, castle_move: bool = False,
+                 promotion: int = 0):
         # the current position of the piece
         self.start_row = start[0]
         self.start_column = start[1]
@@ -23,6 +25,9 @@ class Move:
         self.is_pawn_promotion = False
         self.is_en_passant = en_passant
 
+        # the kind of the new piece (chess.bitboard.KNIGHT to QUEEN), 0 lets the board decide
+        self.promotion = promotion
+
         # recognizes a pawn promotion move
         if isinstance(self.moved_piece, p.Pawn):
             color = self.moved_piece.player.color
@@ -36,7 +41,76 @@ class Move:
 
         start = Move.get_position(self.start_row, self.start_column)
         end = Move.get_position(self.end_row, self.end_column)
-        return f'{start}{end}'
+        promotion = 'nbrq'[self.promotion - 1] if self.promotion != 0 else ''
+        return f'{start}{end}{promotion}'
+
+    def san(self, moves: list[object]) -> str:
+        """
+        Returns the move in the standard algebraic notation without check marks, e.g. 'Nbd2', 'exd5' or 'e8=Q'.
+        The other legal moves of the position are needed to tell two pieces apart which can reach the same square.
+        """
+
+        if self.castle_move:
+            return 'O-O-O' if self.start_column > self.end_column else 'O-O'
+
+        kind = abs(self.moved_piece.code)
+        end = Move.get_position(self.end_row, self.end_column)
+        capture = 'x' if self.captured_piece.code != 0 or self.is_en_passant else ''
+
+        if kind == 1:
+            start = 'abcdefgh'[self.start_column] if capture else ''
+            promotion = ('=' + 'NBRQ'[self.promotion - 1]) if self.promotion != 0 else '=Q'
+            return f'{start}{capture}{end}{promotion if self.is_pawn_promotion else ""}'
+
+        # the other pieces of the same kind which can move to the same square
+        others = [move for move in moves if move.moved_piece.code == self.moved_piece.code
+                  and (move.end_row, move.end_column) == (self.end_row, self.end_column)
+                  and (move.start_row, move.start_column) != (self.start_row, self.start_column)]
+
+        start = ''
+        if len(others) != 0:
+            if all(move.start_column != self.start_column for move in others):
+                start = 'abcdefgh'[self.start_column]
+            elif all(move.start_row != self.start_row for move in others):
+                start = '87654321'[self.start_row]
+            else:
+                start = Move.get_position(self.start_row, self.start_column)
+
+        return f'{" PNBRQK"[kind]}{start}{capture}{end}'
+
+    def key(self) -> int:
+        """
+        Creates an integer to compare two movements with each other, e.g. with a move of the transposition table.
+        """
+
+        return (self.start_row * 8 + self.start_column) * 64 + self.end_row * 8 + self.end_column
+
+    def pack(self) -> int:
+        """
+        Returns the move packed into an integer (see chess.bitboard.encode), a promotion without a kind is a queen.
+        """
+
+        flag = b.NORMAL
+        if self.is_en_passant:
+            flag = b.EN_PASSANT
+        elif self.castle_move:
+            flag = b.CASTLING
+        elif self.is_pawn_promotion:
+            flag = b.PROMOTION
+
+        return b.encode(self.start_row * 8 + self.start_column, self.end_row * 8 + self.end_column, flag,
+                        self.promotion if self.promotion != 0 else b.QUEEN)
+
+    @staticmethod
+    def unpack(move: int, board: object) -> object:
+        """
+        Creates the 'Move' of a packed move, the board must be in the position before the move.
+        """
+
+        start, end, flag, promotion = b.decode(move)
+
+        return Move(divmod(start, 8), divmod(end, 8), board, en_passant=(flag == b.EN_PASSANT),
+                    castle_move=(flag == b.CASTLING), promotion=promotion)
 
     @staticmethod
     def get_position(row: int, column: int) -> str:
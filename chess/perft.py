@@ -0,0 +1,207 @@
+from chess.players import MiniMaxPlayer
+from chess.board import Board, create_board
+from chess.position import Position, START_FEN
+from chess.bitboard import KNIGHT, BISHOP, ROOK, QUEEN, PROMOTION
+from chess.move import Move
+from time import perf_counter
+import argparse
+
+
+# the standard reference positions with their known node counts for the depths 1, 2, 3, ...
+POSITIONS: list[tuple] = [
+    ('initial', START_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     [48, 2039, 97862, 4085603]),
+    ('position 3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+     [14, 191, 2812, 43238, 674624]),
+    ('position 4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+     [6, 264, 9467, 422333]),
+    ('position 5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+     [44, 1486, 62379, 2103487]),
+    ('position 6', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+     [46, 2079, 89890, 3894594]),
+]
+
+PROMOTIONS: list[int] = [KNIGHT, BISHOP, ROOK, QUEEN]
+
+# clears the promotion kind of a packed move
+WITHOUT_PROMOTION: int = (1 << 14) - 1
+
+
+def expand(moves: list[int]) -> list[int]:
+    """
+    The players generate one packed move per pawn promotion, perft counts one move for every possible piece.
+    """
+
+    expanded: list[int] = []
+
+    for move in moves:
+        if (move >> 12) & 3 == PROMOTION:
+            expanded += [(move & WITHOUT_PROMOTION) | ((kind - KNIGHT) << 14) for kind in PROMOTIONS]
+        else:
+            expanded.append(move)
+
+    return expanded
+
+
+def perft(position: Position, depth: int) -> int:
+    """
+    Counts all leaf nodes of the move tree with the passed depth.
+    """
+
+    moves = position.legal_moves()
+
+    if depth == 1:
+        return len(moves) + 3 * sum(1 for move in moves if (move >> 12) & 3 == PROMOTION)
+
+    nodes = 0
+
+    for move in expand(moves):
+        position.make_move(move)
+        nodes += perft(position, depth - 1)
+        position.unmake_move()
+
+    return nodes
+
+
+def divide(board: Board, depth: int) -> dict[str, int]:
+    """
+    Counts the leaf nodes of each move of the position separately, which helps to find a wrong move.
+    """
+
+    position = board.position
+    result: dict[str, int] = {}
+
+    for move in expand(position.legal_moves()):
+        code = Move.unpack(move, board).code()
+        position.make_move(move)
+        result[code] = perft(position, depth - 1) if depth > 1 else 1
+        position.unmake_move()
+
+    return result
+
+
+def tree_size(position: Position, depth: int) -> int:
+    """
+    Counts all positions of the move tree with the passed depth including the root, i.e. the nodes a minimax search
+    without pruning visits. A pawn promotion is a single move like in the search of the players.
+    """
+
+    moves = position.legal_moves()
+
+    if depth == 1:
+        return 1 + len(moves)
+
+    nodes = 1
+
+    for move in moves:
+        position.make_move(move)
+        nodes += tree_size(position, depth - 1)
+        position.unmake_move()
+
+    return nodes
+
+
+def pruning(fen: str, depth: int) -> tuple:
+    """
+    Searches the position with a 'MiniMaxPlayer' without quiescence search, so both count the same leaves.
+    Returns the (searched nodes, cutoffs, nodes of the whole tree), the difference of the nodes is saved by the
+    alpha-beta pruning, the move ordering and the transposition table.
+    """
+
+    player = MiniMaxPlayer(color='white', max_depth=depth, quiescence=False)
+    player.reset_search()
+    player.search(Position(fen), depth)
+
+    return player.nodes, player.cutoffs, tree_size(Position(fen), depth)
+
+
+def run_pruning(positions: list[tuple], depth: int):
+    """
+    Prints the nodes of the search and of the whole tree of every position and how many of them the search saved.
+    """
+
+    searched_total, tree_total = 0, 0
+
+    for (name, fen) in positions:
+        searched, cutoffs, tree = pruning(fen, depth)
+        searched_total += searched
+        tree_total += tree
+
+        print(f'{name:<12} depth {depth}  {tree:>9} tree nodes  {searched:>7} searched  {cutoffs:>6} cutoffs  '
+              f'saved {100 * (1 - searched / tree):5.1f} %')
+
+    saved = 100 * (1 - searched_total / tree_total)
+    print(f'total {tree_total} tree nodes, {searched_total} searched, saved {saved:.1f} %')
+
+
+def run(max_nodes: int = 200000, depth: int = 0) -> bool:
+    """
+    Runs all reference positions up to the largest depth with at most max_nodes leaf nodes (or exactly the passed
+    depth) and prints the node counts and nodes per second. Returns true if all node counts are correct.
+    """
+
+    correct = True
+    total_nodes = 0
+    total_time = 0.0
+
+    for (name, fen, expected) in POSITIONS:
+        depths = [depth] if depth > 0 else [d + 1 for d, nodes in enumerate(expected) if nodes <= max_nodes]
+
+        for d in depths:
+            if d > len(expected):
+                continue
+
+            position = Position(fen)
+            start = perf_counter()
+            nodes = perft(position, d)
+            elapsed = perf_counter() - start
+
+            total_nodes += nodes
+            total_time += elapsed
+            status = 'ok' if nodes == expected[d - 1] else f'FAILED (expected {expected[d - 1]})'
+            correct = correct and nodes == expected[d - 1]
+
+            print(f'{name:<12} depth {d}  {nodes:>9} nodes  {elapsed:7.2f} s  {nodes / elapsed:9.0f} nodes/s  {status}')
+
+    print(f'total {total_nodes} nodes in {total_time:.2f} s, {total_nodes / total_time:.0f} nodes/s')
+    return correct
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Counts the leaf nodes of the move tree (perft).')
+    parser.add_argument('depth', type=int, nargs='?', default=0, help='the depth, all reference positions if missing')
+    parser.add_argument('--fen', help='the position to count, otherwise the reference positions are used')
+    parser.add_argument('--divide', action='store_true', help='prints the leaf nodes of each move')
+    parser.add_argument('--max-nodes', type=int, default=200000, help='the largest reference count to run')
+    parser.add_argument('--pruning', action='store_true',
+                        help='compares the nodes of the alpha-beta search with the whole tree of the depth')
+    arguments = parser.parse_args()
+
+    if arguments.pruning:
+        positions = [('fen', arguments.fen)] if arguments.fen else [(name, fen) for (name, fen, _) in POSITIONS]
+        run_pruning(positions, arguments.depth if arguments.depth > 0 else 3)
+        return
+
+    if arguments.fen is None:
+        raise SystemExit(0 if run(arguments.max_nodes, arguments.depth) else 1)
+
+    board = create_board(arguments.fen)
+    depth = max(arguments.depth, 1)
+    start = perf_counter()
+
+    if arguments.divide:
+        result = divide(board, depth)
+        for code in sorted(result):
+            print(f'{code}: {result[code]}')
+        nodes = sum(result.values())
+    else:
+        nodes = perft(board.position, depth)
+
+    elapsed = perf_counter() - start
+    print(f'{nodes} nodes in {elapsed:.2f} s, {nodes / elapsed:.0f} nodes/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from chess.bitboard import KINDS
 from chess.move import Move
 
 
@@ -16,6 +17,11 @@ class Piece(ABC):
         self.column: int = column
         self.row: int = row
 
+        # the integer code which is stored on the board, white pieces are positive and black pieces are negative
+        self.code: int = 0
+        if player is not None:
+            self.code = (KINDS[name] + 1) if player.color == 'white' else -(KINDS[name] + 1)
+
     def position(self) -> tuple:
         return self.row, self.column
 
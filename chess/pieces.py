@@ -81,28 +81,7 @@ class King(Piece):
         Returns true or false whether the king is in check.
         """
 
-        return self.__square_under_attack(self.row, self.column, board)
-
-    def __square_under_attack(self, row: int, column: int, board: object) -> bool:
-        """
-        A private method which returns true or false whether a square is attachable by an enemy piece.\n
-        This method is only callable inside of a 'King' object.
-        """
-
-        enemy_pieces: list[object] = self.player.enemy.get_pieces(board)
-        enemy_moves: list[object] = []
-
-        for enemy_piece in enemy_pieces:
-            # between two ComputerizedPlayers required to avoid
-            #  'RecursionError: maximum recursion depth exceeded in comparison'
-            if not isinstance(enemy_piece, King):
-                enemy_moves += [i for i in enemy_piece.legal_moves(board)]
-
-        for enemy_move in enemy_moves:
-            if (enemy_move.end_row == row) and (enemy_move.end_column == column):
-                return True
-
-        return False
+        return board.square_attacked(self.position(), self.player.enemy.color)
 
     def legal_moves(self, board: object, pins: list = ()) -> list[object]:
         """
@@ -114,54 +93,40 @@ class King(Piece):
         """
 
         offsets: list[tuple] = [(-1, 0), (0, 1), (1, 0), (0, -1), (-1, -1), (-1, 1), (1, 1), (1, -1)]
+        enemy_color: str = self.player.enemy.color
         moves: list[object] = []
 
+        # a ComputerizedPlayer must check if a move ends in check
+        # a HumanPlayer has to do it itself, only the squares next to the enemy's king are removed
+        computerized: bool = isinstance(self.player, ComputerizedPlayer)
+        enemy_king: tuple = board.king_position(enemy_color)
+
         for (row_off, column_off) in offsets:
             new_column: int = self.column + column_off
             new_row: int = self.row + row_off
 
-            if (new_row in range(0, 8)) and (new_column in range(0, 8)):
+            if (0 <= new_row < 8) and (0 <= new_column < 8):
                 piece = board.get_piece(row=new_row, column=new_column)
                 if piece.player is not self.player:
-                    move = Move(self.position(), (new_row, new_column), board)
+                    if computerized:
+                        # the king itself must not block a sliding piece which attacks the new square
+                        if board.square_attacked((new_row, new_column), enemy_color, without=self.position()):
+                            continue
+                    elif abs(enemy_king[0] - new_row) <= 1 and abs(enemy_king[1] - new_column) <= 1:
+                        continue
 
-                    # a ComputerizedPlayer must check if a move ends in check
-                    if isinstance(self.player, ComputerizedPlayer):
-                        board.move_piece(move)
-
-                        if not self.__square_under_attack(move.end_row, move.end_column, board):
-                            moves.append(move)
-                        board.undo_move()
-
-                    # a HumanPlayer has to do it itself
-                    else:
-                        moves.append(move)
-
-        # remove moves that the enemy's king can also reach
-        enemy_king = self.player.enemy.king_position
-        for (row_off, column_off) in offsets:
-            enemy_column = enemy_king[1] + column_off
-            enemy_row = enemy_king[0] + row_off
-
-            if (enemy_row in range(0, 8)) and (enemy_column in range(0, 8)):
-                for i in range((len(moves) - 1), -1, -1):
-                    move = moves[i]
-
-                    if (enemy_row == move.end_row) and (enemy_column == move.end_column):
-                        moves.remove(move)
+                    moves.append(Move(self.position(), (new_row, new_column), board))
 
         queen_side_castling = False
         king_side_castling = False
 
         # check if castling is allowed
         if self.player.color == 'white':
-            # [-1] returns the last castling log
-            queen_side_castling = board.castling_log[-1][0]
-            king_side_castling = board.castling_log[-1][1]
+            queen_side_castling = board.position.castling[0]
+            king_side_castling = board.position.castling[1]
         elif self.player.color == 'black':
-            # [-1] returns the last castling log
-            queen_side_castling = board.castling_log[-1][2]
-            king_side_castling = board.castling_log[-1][3]
+            queen_side_castling = board.position.castling[2]
+            king_side_castling = board.position.castling[3]
 
         if queen_side_castling:
             # check if all spots are blank
@@ -169,9 +134,9 @@ class King(Piece):
                     isinstance(board.get_piece(self.row, (self.column - 2)), Blank) and \
                     isinstance(board.get_piece(self.row, (self.column - 3)), Blank):
                 # check if the spots are not under attack
-                if not self.__square_under_attack(self.row, self.column, board) and \
-                        not self.__square_under_attack(self.row, (self.column - 1), board) and \
-                        not self.__square_under_attack(self.row, (self.column - 2), board):
+                if not board.square_attacked((self.row, self.column), enemy_color) and \
+                        not board.square_attacked((self.row, (self.column - 1)), enemy_color) and \
+                        not board.square_attacked((self.row, (self.column - 2)), enemy_color):
                     moves.append(Move((self.row, self. column), (self.row, (self.column - 2)), board, castle_move=True))
 
         if king_side_castling:
@@ -179,9 +144,9 @@ class King(Piece):
             if isinstance(board.get_piece(self.row, (self.column + 1)), Blank) and \
                     isinstance(board.get_piece(self.row, (self.column + 2)), Blank):
                 # check if the spots are not under attack
-                if not self.__square_under_attack(self.row, self.column, board) and \
-                        not self.__square_under_attack(self.row, (self.column + 1), board) and \
-                        not self.__square_under_attack(self.row, (self.column + 2), board):
+                if not board.square_attacked((self.row, self.column), enemy_color) and \
+                        not board.square_attacked((self.row, (self.column + 1)), enemy_color) and \
+                        not board.square_attacked((self.row, (self.column + 2)), enemy_color):
                     moves.append(Move(self.position(), (self.row, (self.column + 2)), board, castle_move=True))
 
         return moves
@@ -332,7 +297,7 @@ class Pawn(Piece):
                             moves.append(Move(self.position(), end, board))
                     else:
                         # if a pawn is not pinned and the enemy pawn is able to capture because of en passant
-                        if (not pinned) and (self.player.enemy.en_passant == end):
+                        if (not pinned) and (board.position.en_passant == new_row * 8 + new_column):
                             moves.append(Move(self.position(), end, board, en_passant=True))
 
         return moves
@@ -1,10 +1,16 @@
 from abc import ABC, abstractmethod
-import chess.pieces as p
+from time import perf_counter
+from threading import Thread
+from chess.move import Move
+import chess.bitboard as b
 import sys
 
 
 COLORS: list[str] = ['white', 'black']
 
+# [code] the value of a captured piece for the move ordering, a negative code is a black piece
+VICTIM_VALUES: list[int] = [0, 1, 3, 3, 5, 9, 0, 0, 9, 5, 3, 3, 1]
+
 
 class Player(ABC):
     """
@@ -17,18 +23,9 @@ class Player(ABC):
         self.color: str = color
         self.name: str = name
 
-        self.is_checkmate: bool = False
-        self.is_stalemate: bool = False
-
-        self.en_passant: tuple = ()
-
+        # the state of the game is kept in the position of the board, a player only decides on moves
         if color not in COLORS:
             raise Exception(f"Player color must be in {COLORS} but color is '{color}'")
-        else:
-            if color == 'white':
-                self.king_position = (7, 4)
-            elif color == 'black':
-                self.king_position = (0, 4)
 
     def set_enemy(self, board: object):
         """
@@ -36,32 +33,23 @@ class Player(ABC):
         """
 
         if self.enemy is None:
-            for r in range(8):
-                for c in range(8):
-                    possible_enemy: object = board.get_piece(row=r, column=c)
-                    if not isinstance(possible_enemy, p.Blank):
-                        if possible_enemy.player.color != self.color:
-                            self.enemy = possible_enemy.player
-                            break
+            # any piece of the other color knows its player
+            enemy_squares = board.position.bitboard.occupancy[1 - b.SIDES[self.color]]
+            if enemy_squares:
+                square = (enemy_squares & -enemy_squares).bit_length() - 1
+                self.enemy = board.get_piece(row=square // 8, column=square % 8).player
 
             if self.enemy is None:
                 raise Exception('It is not possible to set the player!')
 
     def get_pieces(self, board: object) -> list[object]:
         """
-        Returns all own pieces on the board.
+        Returns all own pieces on the board.\n
+        The occupancy bitboard of the own color is kept up to date by every move and undo of the board,
+        so only the squares of the live pieces are visited.
         """
 
-        pieces: list[object] = []
-
-        for r in range(8):
-            for c in range(8):
-                piece = board.get_piece(row=r, column=c)
-                if not isinstance(piece, p.Blank):
-                    if piece.player.color == self.color:
-                        pieces.append(piece)
-
-        return pieces
+        return board.piece_list(b.SIDES[self.color])
 
     # this allows the 'HumanPlayer' to move pieces that protect the king
     def legal_moves_simple(self, board: object, pins: list = ()) -> list[object]:
@@ -76,16 +64,6 @@ class Player(ABC):
             for move in piece.legal_moves(board, pins):
                 moves.append(move)
 
-        if len(moves) == 0:
-            king_column = self.king_position[1]
-            king_row = self.king_position[0]
-            king = board.get_piece(king_row, king_column)
-
-            if king.is_check(board):
-                self.is_checkmate = True
-            else:
-                self.is_stalemate = True
-
         return moves
 
     @abstractmethod
@@ -97,210 +75,387 @@ class Player(ABC):
         pass
 
 
+class SearchTimeout(Exception):
+    """
+    Is raised inside of a search if the time is up or the search was stopped.
+    """
+
+    pass
+
+
 class ComputerizedPlayer(Player, ABC):
     """
     A 'ComputerizedPlayer' is an abstract class from which computer-based players inherit.
     Its main purpose is that allowed moves are generated by a superclass. Subordinate classes can then query these.\n
-    It has efficient pin and chess detection.
+    It has efficient pin and chess detection.\n
+    The moves are generated from the 'Position' of the board, which holds the whole state of the game.
+    The settings and statistics of a search are the only state of a player.
     """
 
     def __init__(self, color: str, name: str):
         super().__init__(color=color, name=name)
 
-        self.CHECKMATE: int = 1000
+        # the scores are in centipawns, a checkmate is worth more than all pieces together
+        self.CHECKMATE: int = 100000
         self.STALEMATE: int = 0
 
-        self.in_check = False
-        self.checks = []
-        self.pins = []
+        # a checkmate after n half moves from the root scores CHECKMATE - n, so a faster checkmate is preferred,
+        # every score beyond the bound is a checkmate
+        self.MATE_BOUND: int = self.CHECKMATE - 1000
+
+        # time control of a search, a fixed movetime is preferred to the clock
+        self.movetime: float = None
+        self.clock: float = None
+        self.increment: float = 0
+        self.deadline: float = None
+        self.stopped: bool = False
+        self.completed_depth: int = 0
+
+        # (depth, move, seconds) of every depth completed by the last iterative deepening
+        self.depth_log: list[tuple] = []
+
+        # an 'OpeningBook' (see chess.book) which is consulted before searching
+        self.book: object = None
+
+        # a 'Tablebase' (see chess.tablebase) which scores endgames with a single piece exactly
+        self.tablebase: object = None
+
+        # pondering searches the predicted reply of the opponent in a background thread during the turn of the opponent
+        self.ponder: bool = False
+        self.pondering: bool = False
+        self.ponder_thread: Thread = None
+        self.ponder_hash: int = 0
+        self.ponder_move: int = -1
+        self.ponder_start: float = 0
+
+    def book_move(self, board: object) -> object:
+        """
+        Returns the move of the opening book for the position of the board or None if it is not in the book.
+        """
+
+        if self.book is None:
+            return None
+
+        move = self.book.choose(board.position)
+        return Move.unpack(move, board) if move != -1 else None
+
+    def tablebase_score(self, position: object, ply: int) -> int:
+        """
+        Returns the exact score of the tablebase from the view of the player to move or None if the position is not
+        in the tablebase. A faster checkmate scores higher, so the won position is not only kept but also finished.
+        """
+
+        if self.tablebase is None:
+            return None
+
+        value = self.tablebase.probe(position)
+        if value is None:
+            return None
+
+        if value > 0:
+            return self.CHECKMATE - ply - value
+        if value < 0:
+            return - (self.CHECKMATE - ply + value + 1)
+
+        return self.STALEMATE
+
+    def reset_search(self):
+        """
+        Resets the statistics and buffers of the last search, searching players override it.
+        """
+
+        pass
+
+    def start_pondering(self, board: object):
+        """
+        Starts to search the position after the predicted reply of the opponent in a background thread.
+        The predicted reply is the best move of the transposition table, so only players with a table can ponder.\n
+        While the thread runs, it owns the statistics, lists and the search state of the player. The thread only
+        reads the deadline and the stop flag, which are set by the calling thread. So the player must only be used
+        through finish_pondering, stop_pondering and stop, which best_move and close call first.
+        """
+
+        self.stop_pondering()
+        table = getattr(self, 'table', None)
+        if not self.ponder or table is None:
+            return
+
+        position = board.position.copy()
+
+        entry = table.probe(position.hash)
+        if entry is None or entry[4] == -1 or entry[4] not in position.legal_moves():
+            return
+
+        position.make_move(entry[4])
+
+        # the state of the search is set before the thread starts, the thread does not reset it (see ponder_search)
+        self.reset_search()
+        self.deadline = None
+        self.stopped = False
+        self.completed_depth = 0
+
+        self.pondering = True
+        self.ponder_hash = position.hash
+        self.ponder_move = -1
+        self.ponder_start = perf_counter()
+        self.ponder_thread = Thread(target=self.ponder_search, args=(position,), daemon=True)
+        self.ponder_thread.start()
+
+    def ponder_search(self, position: object):
+        """
+        Searches the predicted position without a time limit until finish_pondering sets a deadline or stops it.
+        """
+
+        self.ponder_move = self.iterative_deepening(position, self.search, self.MAX_DEPTH, ponder=True)
+
+    def finish_pondering(self, board: object) -> object:
+        """
+        Ends the background search when the player has to move. If the opponent played the predicted reply
+        (ponder hit), the search keeps its depths and only continues until the time of this move is used up,
+        its move is returned.
+        Otherwise (ponder miss) it is stopped and None is returned, the search starts from scratch.
+        """
+
+        thread = self.ponder_thread
+        if thread is None:
+            return None
+
+        self.ponder_thread = None
+        self.pondering = False
+
+        if board is None or board.position.hash != self.ponder_hash:
+            self.stop()
+            thread.join()
+            self.stopped = False
+            return None
+
+        # the time of the turn of the opponent counts as time of this move, so a long ponder returns at once
+        budget = self.time_budget()
+        if budget is not None:
+            start = self.ponder_start if self.completed_depth != 0 else perf_counter()
+            self.deadline = start + budget
+
+        thread.join()
+        self.deadline = None
+
+        return Move.unpack(self.ponder_move, board) if self.ponder_move != -1 else None
+
+    def stop_pondering(self):
+        """
+        Stops the background search and waits for it without using its move, e.g. when the game is reset or over.
+        """
+
+        self.finish_pondering(None)
+
+    def table_score(self, score: int, ply: int) -> int:
+        """
+        Returns the score of the player to move as it is stored in a transposition table. A checkmate is counted from
+        the stored position instead of the root, so the entry is also right at another ply or in a later search.
+        """
+
+        if score > self.MATE_BOUND:
+            return score + ply
+        if score < - self.MATE_BOUND:
+            return score - ply
+
+        return score
+
+    def search_score(self, score: int, ply: int) -> int:
+        """
+        Returns the score of a transposition table entry (see table_score) for the position at the ply of the search.
+        """
+
+        if score > self.MATE_BOUND:
+            return score - ply
+        if score < - self.MATE_BOUND:
+            return score + ply
+
+        return score
+
+    def set_clock(self, remaining: float, increment: float = 0):
+        """
+        Sets the remaining time on the clock and the increment per move in seconds.
+        """
+
+        self.clock = remaining
+        self.increment = increment
+
+    def stop(self):
+        """
+        Stops a running search, it returns the best move of the last completed depth.
+        """
+
+        self.stopped = True
+
+    def time_budget(self) -> float:
+        """
+        Returns the time in seconds for the next move or None if there is no time control.
+        """
+
+        if self.movetime is not None:
+            return self.movetime
+
+        if self.clock is not None:
+            # the remaining time is spread over the next 30 moves, but the clock must never run out
+            return max(min(self.clock / 30 + self.increment * 0.8, self.clock - 0.05), 0.01)
+
+        return None
+
+    def check_time(self):
+        """
+        Raises a 'SearchTimeout' if the search was stopped or the time is up.
+        """
+
+        if self.stopped or (self.deadline is not None and perf_counter() > self.deadline):
+            raise SearchTimeout()
+
+    def iterative_deepening(self, position: object, search, max_depth: int, ponder: bool = False) -> int:
+        """
+        Calls search(position, depth) for the depths 1 to max_depth until the time is up or the search is stopped.
+        Returns the best packed move of the last completed depth or -1 if there is no legal move.\n
+        A ponder search has no time budget, its deadline and stop flag are only set by the thread that started it.
+        """
+
+        budget = self.time_budget() if not ponder else None
+        start = perf_counter()
+        length = len(position.stack)
+
+        if not ponder:
+            self.deadline = (start + budget) if budget is not None else None
+            self.stopped = False
+
+        self.completed_depth = 0
+        self.depth_log = []
+        best_move = -1
+
+        for depth in range(1, max_depth + 1):
+            try:
+                move = search(position, depth)
+            except SearchTimeout:
+                # the interrupted search left its moves on the position
+                while len(position.stack) > length:
+                    position.unmake_move()
+                break
+
+            best_move = move
+            self.completed_depth = depth
+            self.depth_log.append((depth, move, perf_counter() - start))
+
+            # the next depth takes several times longer, so it is not started if it cannot finish in time
+            if move == -1 or (budget is not None and perf_counter() - start > budget / 2):
+                break
+
+        if not ponder:
+            self.deadline = None
+
+        # if not even the first depth was completed, any legal move is better than none
+        if best_move == -1:
+            valid_moves = position.legal_moves()
+            best_move = valid_moves[0] if len(valid_moves) != 0 else -1
+
+        return best_move
 
     def legal_moves(self, board: object) -> list[object]:
         """
-        Creates all legal moves. Here, in contrast to 'HumanPlayer', pinned pieces and checks are also recognized.
+        Creates all legal moves of the player to move. Here, in contrast to 'HumanPlayer', pinned pieces and checks
+        are also recognized.\n
+        The moves are generated as packed integers from the position of the board and converted to 'Move' objects
+        afterwards. A search should use the packed moves of the position instead.
         """
 
-        self.update_pins_and_checks(board)
-        valid_moves: list[object] = self.legal_moves_simple(board=board, pins=self.pins)
-
-        king_column = self.king_position[1]
-        king_row = self.king_position[0]
-        king = board.get_piece(king_row, king_column)
-
-        if self.in_check:
-            # if it's in one check
-            if len(self.checks) == 1:
-                check = self.checks[0]
-                check_row = check[0]
-                check_column = check[1]
-
-                piece_checking = board.get_piece(check_row, check_column)
-                valid_squares = []
-
-                if isinstance(piece_checking, p.Knight):
-                    # if it's a knight, king must move or other piece must capture knight
-                    valid_squares = [(check_row, check_column)]
-                else:
-                    # allows moves to any square between the king and the attacking piece
-                    for i in range(1, 8):
-                        valid_column = self.king_position[1] + (i * check[3])
-                        valid_row = self.king_position[0] + (i * check[2])
-                        valid_squares.append((valid_row, valid_column))
-
-                        if (valid_row == check_row) and (valid_column == check_column):
-                            break
-
-                # get rid of any moves that do not block check or move king
-                for i in range((len(valid_moves) - 1), -1, -1):
-                    piece_type = valid_moves[i].moved_piece
-
-                    # if the checking piece is a king do not delete this move
-                    if not isinstance(piece_type, p.King):
-                        if not (valid_moves[i].end_row, valid_moves[i].end_column) in valid_squares:
-                            valid_moves.remove(valid_moves[i])
-
-            # if it's in double check, king has to move
-            else:
-                valid_moves = king.legal_moves(board)
-
-        if len(valid_moves) == 0:
-            if self.in_check:
-                # print('CHECKMATE')
-                self.is_checkmate = True
-            else:
-                # print('STALEMATE')
-                self.is_stalemate = True
-
-        return valid_moves
-
-    def update_pins_and_checks(self, board: object):
-        """
-        Pins and checks are updated efficiently.\n
-        This is probably the most complicated function in the whole project.
-        """
-
-        # [4] [0] [5]   -> the numbers represents the values in the array
-        # [3]  K  [1]   -> [0] to [3] inclusive represents orthogonally moves
-        # [7] [2] [6]   -> [4] to [7] inclusive represents diagonally moves
-        king_offsets: list[tuple] = [(-1, 0), (0, 1), (1, 0), (0, -1), (-1, -1), (-1, 1), (1, 1), (1, -1)]
-
-        # resets the check controlling
-        self.in_check = False
-        self.checks = []
-        self.pins = []
-
-        for j in range(len(king_offsets)):
-            king_offset = king_offsets[j]
-            possible_pin = ()
-
-            # starts at 1 because 0 would not change the position of the king
-            for i in range(1, 8):
-                end_column = self.king_position[1] + (i * king_offset[1])
-                end_row = self.king_position[0] + (i * king_offset[0])
-
-                # checks if the moves are on the board
-                if (end_row in range(0, 8)) and (end_column in range(0, 8)):
-                    end_piece = board.get_piece(end_row, end_column)
-
-                    if not isinstance(end_piece, p.Blank):
-                        # own pieces must be tested for 'pins'
-                        if end_piece.player.color == self.color:
-                            if possible_pin == ():
-                                possible_pin = (end_row, end_column, king_offset[0], king_offset[1])
-                            else:
-                                break
-
-                        # opponent's pieces must be tested for 'checks'
-                        elif end_piece.player.color != self.color:
-                            # THERE ARE FIVE CONDITIONS TO CONTROL
-                            # 1.) orthogonally away from king and piece is a rook
-                            cond_rook = (j in range(0, 4) and isinstance(end_piece, p.Rook))
-
-                            # 2.) diagonally away from king and piece is a bishop
-                            cond_bishop = (j in range(4, 8) and isinstance(end_piece, p.Bishop))
-
-                            # 3.) one square away diagonally from king and piece is a pawn
-                            cond_pawn = (i == 1 and (isinstance(end_piece, p.Pawn)) and
-                                         ((self.enemy.color == 'white' and j in range(6, 8)) or
-                                          (self.enemy.color == 'black' and j in range(4, 6))))
-
-                            # 4.) any direction and piece is a queen
-                            cond_queen = isinstance(end_piece, p.Queen)
-
-                            # 5.) any direction one square away and piece is a king
-                            cond_king = (i == 1 and isinstance(end_piece, p.King))
-
-                            if cond_rook or cond_bishop or cond_pawn or cond_queen or cond_king:
-                                if possible_pin == ():
-                                    self.in_check = True
-                                    self.checks.append((end_row, end_column, king_offset[0], king_offset[1]))
-                                    break
-                                else:
-                                    self.pins.append(possible_pin)
-                                    break
-                            else:
-                                break
-
-        # knight offsets listed clockwise starting at 1 o'clock
-        #  -  [7]  -  [0]  -
-        # [6]  -   -   -  [1]
-        #  -   -   N   -   -
-        # [5]  -   -   -  [2]
-        #  -  [4]  -  [3]  -
-        knight_offsets: list[tuple] = [(-2, 1), (-1, 2), (1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1)]
-
-        # the opponent's knight moves must be tested for 'checks'
-        for knight_offset in knight_offsets:
-            end_column = self.king_position[1] + knight_offset[1]
-            end_row = self.king_position[0] + knight_offset[0]
-
-            if (end_row in range(0, 8)) and (end_column in range(0, 8)):
-                end_piece = board.get_piece(end_row, end_column)
-
-                if not isinstance(end_piece, p.Blank):
-                    if (end_piece.player.color != self.color) and (isinstance(end_piece, p.Knight)):
-                        self.checks.append((end_row, end_column, knight_offset[0], knight_offset[1]))
-                        self.in_check = True
+        return [Move.unpack(move, board) for move in board.position.legal_moves()]
 
     @staticmethod
-    def score_board(board: object):
-        score = 0
+    def staged_moves(position: object, hash_move: int = -1, killers: tuple = (), buffers: tuple = ()):
+        """
+        Yields all legal packed moves in stages: the move of the transposition table, the captures and promotions
+        ordered by MVV-LVA, the killer moves and then all other quiet moves.\n
+        A stage is only generated when the previous one is used up, so a cutoff by an early move saves the
+        generation of all quiet moves. The position must be the same whenever the next move is requested.
+        Two lists can be passed as buffers, which are refilled with the captures and the quiet moves.
+        """
 
-        for r in range(8):
-            for c in range(8):
-                piece = board.get_piece(r, c)
+        pins_and_checks = position.pins_and_checks()
+        captures, quiets = buffers if buffers else ([], [])
 
-                if piece.player is not None:
-                    if piece.player.color == 'white':
-                        score += piece.evaluation
-                    elif piece.player.color == 'black':
-                        score -= piece.evaluation
+        # a stored move could belong to another position with the same index, so it is validated first
+        if hash_move != -1:
+            origin = 1 << ((hash_move >> 6) & 63)
+            if hash_move in position.legal_moves(origins=origin, pins_and_checks=pins_and_checks):
+                yield hash_move
 
-        return score
+        position.legal_moves(captures, quiets=False, pins_and_checks=pins_and_checks)
+        for move in ComputerizedPlayer.order_moves(position, captures):
+            if move != hash_move:
+                yield move
+
+        # a killer is only searched if it is a legal quiet move in this position
+        for killer in killers:
+            if killer != -1 and killer != hash_move:
+                origin = 1 << ((killer >> 6) & 63)
+                if killer in position.legal_moves(captures=False, origins=origin, pins_and_checks=pins_and_checks):
+                    yield killer
 
-    def score_board_improved(self, board: object):
-        if self.is_checkmate:
-            return - self.CHECKMATE
-        elif self.is_stalemate:
-            return self.STALEMATE
+        position.legal_moves(quiets, captures=False, pins_and_checks=pins_and_checks)
+        for move in quiets:
+            if move != hash_move and move not in killers:
+                yield move
 
-        elif self.enemy.is_checkmate:
-            return self.CHECKMATE
-        elif self.enemy.is_stalemate:
-            return self.STALEMATE
+    @staticmethod
+    def order_moves(position: object, moves: list[int], hash_move: int = -1, killers: tuple = ()) -> list[int]:
+        """
+        Sorts the packed moves for an alpha-beta search in place. The move of the transposition table comes first,
+        then the captures by MVV-LVA (most valuable victim, least valuable attacker), then the pawn promotions,
+        then the killer moves (quiet moves which caused a cutoff in a sibling position) and then all other quiet moves.
+        """
 
-        score = 0
+        squares = position.squares
 
-        for r in range(8):
-            for c in range(8):
-                piece = board.get_piece(r, c)
+        def priority(move: int) -> int:
+            if move == hash_move:
+                return 10000
+            if move in killers:
+                return 100
 
-                if piece.player is not None:
-                    if piece.player.color == 'white':
-                        score += piece.evaluation
-                    elif piece.player.color == 'black':
-                        score -= piece.evaluation
+            score = 0
+            flag = (move >> 12) & 3
+            if flag == b.PROMOTION:
+                score += 500
 
-        return score
+            victim = VICTIM_VALUES[squares[move & 63]]
+            if flag == b.EN_PASSANT:
+                victim = 1
+
+            if victim != 0:
+                score += 1000 + victim * 10 - abs(squares[(move >> 6) & 63])
+
+            return score
+
+        moves.sort(key=priority, reverse=True)
+        return moves
+
+    @staticmethod
+    def score_board(board: object) -> int:
+        """
+        Returns the material and piece-square score in centipawns from the view of white.
+        The position keeps the evaluation up to date with every move, so this costs the same for every position.
+        """
+
+        return board.position.evaluate()
+
+    def score_board_improved(self, board: object) -> int:
+        """
+        Returns the score in centipawns from the view of white, a checkmate or stalemate is recognized as well.
+        """
+
+        position = board.position
+
+        if len(position.legal_moves()) == 0:
+            if not position.in_check():
+                return self.STALEMATE
+            return - self.CHECKMATE if position.white_move else self.CHECKMATE
+
+        return position.evaluate()
 
     @abstractmethod
     def best_move(self, board: object) -> object:
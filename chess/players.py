@@ -1,9 +1,25 @@
-from chess.player import Player, ComputerizedPlayer
+from chess.transposition import TranspositionTable, SharedTranspositionTable, FileTranspositionTable
+from chess.transposition import EXACT, LOWER, UPPER, FLIPPED
+from chess.player import Player, ComputerizedPlayer, SearchTimeout
+from chess.tablebase import Tablebase
+from chess.position import Position
+from chess.bitboard import EN_PASSANT, PROMOTION
+from chess.move import Move
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import Event
 from random import choice, shuffle
+from time import perf_counter
+import chess.evaluation as e
 
-# CHECKMATE: int = 1000
+# CHECKMATE: int = 100000
 # STALEMATE: int = 0
 
+# a capture in the quiescence search is skipped if even the captured piece and this margin cannot reach the window
+DELTA_MARGIN: int = 200
+
+# [code] the value of a captured piece for the delta pruning, a negative code is a black piece
+CAPTURE_VALUES: list[int] = [0] + e.MG_VALUES[0:5] + [0, 0] + list(reversed(e.MG_VALUES[0:5]))
+
 
 class HumanPlayer(Player):
     """
@@ -50,6 +66,10 @@ class RandomPlayer(ComputerizedPlayer):
         Returns a random legal move.
         """
 
+        book_move = self.book_move(board)
+        if book_move is not None:
+            return book_move
+
         move = None
 
         try:
@@ -75,6 +95,10 @@ class GreedyPlayer(ComputerizedPlayer):
         Returns a greedy move.
         """
 
+        book_move = self.book_move(board)
+        if book_move is not None:
+            return book_move
+
         # to handle black and white players
         turn_multiplier = 1 if self.color == 'white' else -1
 
@@ -84,10 +108,10 @@ class GreedyPlayer(ComputerizedPlayer):
         for player_move in self.legal_moves(board):
             board.move_piece(player_move, move_finding=True)
 
-            # if the enemy has no legal ‚moves after this move before
-            if not self.enemy.is_checkmate:
+            # if the enemy has no legal moves after this move
+            if board.position.is_checkmate():
                 score = self.CHECKMATE
-            elif self.enemy.is_stalemate:
+            elif board.position.is_stalemate():
                 score = self.STALEMATE
             else:
                 score = turn_multiplier * ComputerizedPlayer.score_board(board)
@@ -115,6 +139,10 @@ class MiniMaxIterativePlayer(ComputerizedPlayer):
         Returns the best move after two iterations
         """
 
+        book_move = self.book_move(board)
+        if book_move is not None:
+            return book_move
+
         # to handle black and white players
         turn_multiplier = 1 if self.color == 'white' else -1
 
@@ -130,13 +158,17 @@ class MiniMaxIterativePlayer(ComputerizedPlayer):
             enemy_moves = self.enemy.legal_moves(board)
             enemy_max_score = - self.CHECKMATE
 
+            # a stalemate is a draw and not a win
+            if len(enemy_moves) == 0 and not board.position.in_check():
+                enemy_max_score = self.STALEMATE
+
             for enemy_move in enemy_moves:
                 board.move_piece(enemy_move, move_finding=True)
 
-                # if the enemy has no legal ‚moves after this move before
-                if self.enemy.is_checkmate:
-                    score = - turn_multiplier * self.CHECKMATE
-                elif self.enemy.is_stalemate:
+                # if the player has no legal moves after the move of the enemy
+                if board.position.is_checkmate():
+                    score = self.CHECKMATE
+                elif board.position.is_stalemate():
                     score = self.STALEMATE
                 else:
                     score = - turn_multiplier * ComputerizedPlayer.score_board(board)
@@ -158,90 +190,871 @@ class MiniMaxIterativePlayer(ComputerizedPlayer):
 class MiniMaxPlayer(ComputerizedPlayer):
     """
     A 'MiniMaxPlayer' is a computerized player and inherits from 'ComputerizedPlayer'.
-    He chooses the best own move.
+    He chooses the best own move.\n
+    The search uses alpha-beta pruning and searches captures first, so most moves of a position are never searched.
+    Already searched positions are remembered in a 'TranspositionTable' by their zobrist hash,
+    so transposed positions are not searched again.\n
+    Without a time control he searches max_depth. With a movetime or a clock (see set_clock) he searches
+    one depth after another up to max_depth and returns the move of the last depth completed in time.\n
+    At the last depth the captures and promotions are searched until the position is quiet (see quiesce),
+    so a leaf is never scored in the middle of an exchange. The experimental batch evaluation needs quiescence=False.\n
+    With more than one worker the root moves are searched in parallel by a pool of processes (see parallel_search).\n
+    With ponder he searches the predicted reply of the opponent during the turn of the opponent (see start_pondering).
     """
 
-    def __init__(self, color: str, max_depth=3):
+    def __init__(self, color: str, max_depth=3, table_size: int = 1 << 18, movetime: float = None, workers: int = 1,
+                 batch: bool = False, quiescence: bool = True, table_path: str = None, ponder: bool = False,
+                 table: object = None):
         super().__init__(color=color, name='MiniMaxPlayer')
-        self.next_move = None
+        self.next_move: int = -1
         self.MAX_DEPTH = max_depth
+        self.root_depth = max_depth
+        self.movetime = movetime
+        self.ponder = ponder
+
+        # the workers search with tables of their own, the file would only keep the root and the replies
+        if table_path is not None and workers > 1:
+            raise ValueError('a table file needs workers=1, the workers of a parallel search have their own tables')
+
+        # with a path the results are kept in a file for the next process (see FileTranspositionTable),
+        # a passed table is searched with instead of a new one (see LazySMPPlayer)
+        if table is not None:
+            self.table = table
+        elif table_path is not None:
+            self.table = FileTranspositionTable(table_path, table_size, 'quiesce' if quiescence else 'static')
+        else:
+            self.table = TranspositionTable(table_size)
+
+        # the pool of worker processes is only started by the first parallel search,
+        # it is started again if the settings of the workers have changed since (see worker_settings)
+        self.workers: int = workers
+        self.pool: ProcessPoolExecutor = None
+        self.pool_settings: tuple = None
+
+        # is set to stop the worker or helper processes, they check it like the time
+        self.stop_event: Event = None
+
+        # experimental, evaluates the children of the last depth together (see evaluate_children), the captures of
+        # the children are not searched then, so it cannot be combined with the quiescence search
+        if batch and quiescence:
+            raise ValueError('batch evaluation needs quiescence=False, it does not search the captures of a leaf')
+
+        self.batch: bool = batch
+        self.quiescence: bool = quiescence
+
+        # only takes the scores of the table which were searched with the same depth, a deeper score would make the
+        # result depend on the positions searched before, which a worker of the parallel search must avoid
+        self.same_depth: bool = False
+
+        # one reusable list of packed moves per ply, so the search creates no 'Move' objects
+        self.buffers: list[list[int]] = []
+
+        # statistics of the last search, cutoffs counts the positions whose remaining moves were not searched,
+        # the skipped moves themselves are never generated (see staged_moves), so they are not counted,
+        # the saved nodes are the nodes of the whole tree minus the searched ones (see chess.perft.pruning)
+        self.nodes: int = 0
+        self.cutoffs: int = 0
 
     def best_move(self, board: object) -> object:
         """
         Returns the best move by given depth.
         """
 
+        # the search of the turn of the opponent has already found the move if the opponent played the predicted reply
+        ponder_move = self.finish_pondering(board)
+        if ponder_move is not None:
+            return ponder_move
+
+        self.reset_search()
+
+        book_move = self.book_move(board)
+        if book_move is not None:
+            return book_move
+
+        if self.time_budget() is None:
+            position = board.position
+            length = len(position.stack)
+            self.stopped = False
+
+            try:
+                move = self.search(position, self.MAX_DEPTH)
+            except SearchTimeout:
+                # the stopped search left its moves on the position and has no move
+                while len(position.stack) > length:
+                    position.unmake_move()
+                move = -1
+        else:
+            move = self.iterative_deepening(board.position, self.search, self.MAX_DEPTH)
+
+        # only the chosen move leaves the search as a 'Move'
+        return Move.unpack(move, board) if move != -1 else None
+
+    def reset_search(self):
+        """
+        Resets the statistics and buffers of the last search.
+        """
+
+        self.nodes = 0
+        self.cutoffs = 0
+        self.buffers = [([], []) for _ in range(self.MAX_DEPTH + 1)]
+
+        if self.stop_event is not None:
+            self.stop_event.clear()
+
+    def stop(self):
+        """
+        Stops a running search together with the searches of its worker or helper processes.
+        """
+
+        super().stop()
+        if self.stop_event is not None:
+            self.stop_event.set()
+
+    def check_time(self):
+        """
+        Raises a 'SearchTimeout' if the search was stopped, the time is up or the worker processes are stopped.
+        """
+
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchTimeout()
+
+        super().check_time()
+
+    def search(self, position: object, depth: int) -> int:
+        """
+        Searches the position with the passed depth and returns the best packed move or -1.
+        """
+
+        if self.workers > 1:
+            return self.parallel_search(position, depth)
+
         # reset next move from before
-        self.next_move = None
+        self.next_move = -1
+        self.root_depth = depth
 
-        is_white = self.color == 'white'
-        self.find_move(board, is_white, self.MAX_DEPTH)
+        self.find_move(position, depth, - self.CHECKMATE - 1, self.CHECKMATE + 1)
 
         return self.next_move
 
-    def find_move(self, board: object, is_white: bool, depth: int):
+    def worker_settings(self) -> tuple:
+        """
+        Returns the settings a worker process needs to search like this player:
+        (max_depth, table_size, quiescence, batch, path of the tablebase).
+        """
+
+        tablebase = self.tablebase.path if self.tablebase is not None else None
+        return self.MAX_DEPTH, self.table.size, self.quiescence, self.batch, tablebase
+
+    def parallel_search(self, position: object, depth: int) -> int:
+        """
+        Splits the root moves over the worker processes. A worker only receives the FEN of the position and one
+        packed move and searches the rest of the depth with the settings of this player (see worker_settings).
+        Each worker keeps its transposition table for all moves and depths, but only takes the scores of the same
+        depth (see same_depth), so a score does not depend on the moves the worker searched before.\n
+        The best move of the previous depth is searched first and alone, its score is the bound for all other moves,
+        which are searched at the same time. A move that does not beat the bound is not searched exactly.
+        The scores are combined in the order of the moves, so of equal scores the first move is chosen, no matter
+        which worker finishes first or how many workers there are.\n
+        The root and the best reply to every move are stored in the own table, so pondering predicts the reply.
+        """
+
+        settings = self.worker_settings()
+        if self.pool is not None and self.pool_settings != settings:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+        if self.pool is None:
+            self.stop_event = Event()
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=attach_worker,
+                                            initargs=(settings, self.stop_event))
+            self.pool_settings = settings
+
+        # the workers stop by the event, so a stopped search does not start another depth
+        self.check_time()
+
+        # the root entry holds the best move of the previous depth, without it the first move and its bound would
+        # only be a guess, so the previous depths are searched first
+        entry = self.table.probe(position.hash)
+        if depth > 1 and (entry is None or entry[1] < depth - 1):
+            self.parallel_search(position, depth - 1)
+            entry = self.table.probe(position.hash)
+
+        hash_move = entry[4] if entry is not None else -1
+
+        self.next_move = -1
+        self.root_depth = depth
+
+        # the workers cannot share the deadline, so they get the remaining time
+        seconds = self.deadline - perf_counter() if self.deadline is not None else None
+
+        moves = ComputerizedPlayer.order_moves(position, position.legal_moves(), hash_move)
+        fen = position.fen()
+        infinity = self.CHECKMATE + 1
+        alpha, beta = - infinity, infinity
+        best_score = 0
+
+        for index, move in enumerate(moves):
+            if index == 0:
+                futures = [self.pool.submit(search_root_move, fen, move, depth, settings, seconds, alpha, beta)]
+            elif index == 1:
+                # white only looks for higher scores, black for lower ones
+                alpha, beta = (best_score, infinity) if position.white_move else (- infinity, best_score)
+                futures += [self.pool.submit(search_root_move, fen, later, depth, settings, seconds, alpha, beta)
+                            for later in moves[1:]]
+
+            try:
+                # the workers only see the event, so the deadline and the stop flag are checked while waiting
+                while not futures[index].done():
+                    self.check_time()
+                    wait([futures[index]], timeout=0.01)
+
+                # the depth is incomplete if a single move was not searched in time
+                score, nodes, reply = futures[index].result()
+                if score is None:
+                    raise SearchTimeout()
+            except SearchTimeout:
+                self.stop_workers(futures)
+                raise
+
+            self.nodes += nodes
+
+            # the score of a move that did not beat the bound is only a bound (see find_move)
+            flag = EXACT
+            if score <= alpha:
+                flag = UPPER
+            elif score >= beta:
+                flag = LOWER
+
+            position.make_move(move)
+            self.store(position, depth - 1, score, flag, reply, 1)
+            position.unmake_move()
+
+            if self.next_move == -1 or (score > best_score if position.white_move else score < best_score):
+                best_score = score
+                self.next_move = move
+
+        if self.next_move != -1:
+            self.store(position, depth, best_score, EXACT, self.next_move, 0)
+
+        return self.next_move
+
+    def stop_workers(self, futures: list):
+        """
+        Stops the searches of the worker processes and waits for them, so no search of an incomplete depth keeps
+        a worker busy when the next search starts.
+        """
+
+        self.stop_event.set()
+        for future in futures:
+            future.cancel()
+
+        wait(futures)
+
+    def close(self):
+        """
+        Stops pondering, shuts down the worker processes of the parallel search and closes the file of the
+        transposition table.
+        """
+
+        self.stop_pondering()
+
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+        if isinstance(self.table, FileTranspositionTable):
+            self.table.close()
+
+    def find_move(self, position: object, depth: int, alpha: int, beta: int):
         """
         A recursive method to find the best move by given depth.
+        White maximizes and black minimizes the score, alpha and beta are the scores both can already reach.
         """
-        
+
+        is_white = position.white_move
+        ply = self.root_depth - depth
+        self.nodes += 1
+        alpha_start, beta_start = alpha, beta
+        hash_move = -1
+
+        if (self.nodes & 255) == 0 or self.stopped:
+            self.check_time()
+
+        # a position of the tablebase has an exact score, only the root is searched for its move
+        if self.tablebase is not None and depth != self.root_depth:
+            score = self.tablebase_score(position, ply)
+            if score is not None:
+                return score if is_white else - score
+
+        entry = self.table.probe(position.hash)
+        if entry is not None:
+            hash_move = entry[4]
+
+            # the root is always searched, because the move itself is needed
+            if (entry[1] == depth if self.same_depth else entry[1] >= depth) and depth != self.root_depth:
+                # the table keeps the score of the player to move, a lower bound of black is an upper bound of white
+                score = self.search_score(entry[2], ply)
+                flag = entry[3]
+                if not is_white:
+                    score, flag = - score, FLIPPED[flag]
+
+                if flag == EXACT:
+                    return score
+                elif flag == LOWER:
+                    alpha = max(alpha, score)
+                elif flag == UPPER:
+                    beta = min(beta, score)
+
+                if alpha >= beta:
+                    return score
+
+        # leaves are stored as well, because transpositions at depth 3 are only found there
         if depth == 0:
-            return self.score_board_improved(board)
+            if not self.quiescence:
+                score = position.evaluate()
+                self.store(position, 0, score, EXACT, -1, ply)
+                return score
+
+            score = self.quiesce(position, alpha, beta, ply)
+
+            flag = EXACT
+            if score <= alpha:
+                flag = UPPER
+            elif score >= beta:
+                flag = LOWER
+
+            self.store(position, 0, score, flag, -1, ply)
+            return score
+
+        if depth == 1 and self.batch:
+            return self.evaluate_children(position)
+
+        best_move = -1
+        best_score = 0
 
-        valid_moves = []
+        # the quiet moves are only generated if no capture caused a cutoff
+        buffers = self.buffers[self.root_depth - depth]
+        for move in ComputerizedPlayer.staged_moves(position, hash_move, (), buffers):
+            position.make_move(move)
+            score = self.find_move(position, depth - 1, alpha, beta)
+            position.unmake_move()
+
+            if best_move == -1 or (score > best_score if is_white else score < best_score):
+                best_score = score
+                best_move = move
+
+                if depth == self.root_depth:
+                    self.next_move = move
 
-        if self.color == 'white':
             if is_white:
-                valid_moves = self.legal_moves(board)
+                alpha = max(alpha, score)
             else:
-                valid_moves = self.enemy.legal_moves(board)
+                beta = min(beta, score)
+
+            # the opponent would never allow this position, so the remaining moves are not searched
+            if alpha >= beta:
+                self.cutoffs += 1
+                break
+
+        # the score of a checkmate or stalemate only depends on the position and the ply
+        if best_move == -1:
+            if position.in_check():
+                return - (self.CHECKMATE - ply) if is_white else self.CHECKMATE - ply
+            return self.STALEMATE
+
+        # the score is only a bound if the search was cut off or no move reached the window
+        flag = EXACT
+        if best_score <= alpha_start:
+            flag = UPPER
+        elif best_score >= beta_start:
+            flag = LOWER
+
+        self.store(position, depth, best_score, flag, best_move, ply)
+        return best_score
+
+    def store(self, position: object, depth: int, score: int, flag: int, move: int, ply: int):
+        """
+        Stores a score from the view of white in the transposition table, which keeps the scores of the player
+        to move (see table_score), so the entries are the same as the ones of 'NegaScoutPlayer'.
+        """
+
+        if not position.white_move:
+            score, flag = - score, FLIPPED[flag]
+
+        self.table.store(position.hash, depth, self.table_score(score, ply), flag, move)
+
+    def quiesce(self, position: object, alpha: int, beta: int, ply: int) -> int:
+        """
+        Searches only the captures and promotions of a leaf until the position is quiet.
+        The player to move may also stand pat, i.e. keep the score of the position instead of capturing.
+        A capture which cannot reach the window even with the whole captured piece is not searched (delta pruning).
+        In check there is no standing pat, so all moves are searched and a checkmate is recognized.
+        """
+
+        is_white = position.white_move
+        in_check = position.in_check()
+        self.nodes += 1
+
+        if (self.nodes & 255) == 0 or self.stopped:
+            self.check_time()
+
+        # the lists of deeper plies are added on demand, because the captures have no fixed depth
+        if ply == len(self.buffers):
+            self.buffers.append(([], []))
+        moves = position.legal_moves(self.buffers[ply][0], quiets=in_check)
+
+        if in_check:
+            if len(moves) == 0:
+                return - (self.CHECKMATE - ply) if is_white else self.CHECKMATE - ply
+            best_score = - self.CHECKMATE - 1 if is_white else self.CHECKMATE + 1
+            stand_pat = None
+        else:
+            best_score = stand_pat = position.evaluate()
 
-        elif self.color == 'black':
             if is_white:
-                valid_moves = self.enemy.legal_moves(board)
+                if stand_pat >= beta:
+                    return stand_pat
+                alpha = max(alpha, stand_pat)
             else:
-                valid_moves = self.legal_moves(board)
+                if stand_pat <= alpha:
+                    return stand_pat
+                beta = min(beta, stand_pat)
+
+        squares = position.squares
+        for move in ComputerizedPlayer.order_moves(position, moves):
+            if stand_pat is not None:
+                gain = CAPTURE_VALUES[squares[move & 63]] + DELTA_MARGIN
+                flag = (move >> 12) & 3
+                if flag == EN_PASSANT:
+                    gain += CAPTURE_VALUES[1]
+                elif flag == PROMOTION:
+                    gain += CAPTURE_VALUES[5] - CAPTURE_VALUES[1]
+
+                if (stand_pat + gain <= alpha) if is_white else (stand_pat - gain >= beta):
+                    continue
+
+            position.make_move(move)
+            score = self.quiesce(position, alpha, beta, ply + 1)
+            position.unmake_move()
+
+            if score > best_score if is_white else score < best_score:
+                best_score = score
 
-        if is_white:
-            max_score = - self.CHECKMATE
+            if is_white:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
 
-            for move in valid_moves:
-                board.move_piece(move, move_finding=True)
-                # enemy_moves = self.enemy.legal_moves(board)
-                score = self.find_move(board, False, depth - 1)
+            if alpha >= beta:
+                break
 
-                if score > max_score:
-                    max_score = score
+        return best_score
 
-                    if depth == self.MAX_DEPTH:
-                        self.next_move = move
+    def evaluate_children(self, position: object) -> int:
+        """
+        Scores all children of a position of depth 1 with a single call of chess.evaluation.evaluate_batch.
+        The children are not pruned, so the returned score is exact.\n
+        This is experimental: the batch gives up the cutoffs among the children and the search becomes
+        two to three times slower than with the incremental evaluation, so it is off by default.
+        """
 
-                board.undo_move()
+        is_white = position.white_move
+        ply = self.root_depth - 1
+        moves = position.legal_moves(self.buffers[ply][0])
 
-            return max_score
+        if len(moves) == 0:
+            if position.in_check():
+                return - (self.CHECKMATE - ply) if is_white else self.CHECKMATE - ply
+            return self.STALEMATE
 
-        else:
-            min_score = self.CHECKMATE
+        rows: list[bytes] = []
+        for move in moves:
+            position.make_move(move)
+            rows.append(position.squares.tobytes())
+            position.unmake_move()
 
-            for move in valid_moves:
-                board.move_piece(move, move_finding=True)
-                # enemy_moves = self.enemy.legal_moves(board)
-                score = self.find_move(board, True, depth - 1)
+        self.nodes += len(moves)
+        scores = e.evaluate_batch(e.stack_squares(rows))
 
-                if score < min_score:
-                    min_score = score
+        # of equal scores the first move is chosen like in find_move
+        index = int(scores.argmax() if is_white else scores.argmin())
+        best_score = int(scores[index])
 
-                    if depth == self.MAX_DEPTH:
-                        self.next_move = move
+        if self.root_depth == 1:
+            self.next_move = moves[index]
 
-                board.undo_move()
+        self.store(position, 1, best_score, EXACT, moves[index], ply)
+        return best_score
+
+
+class LazySMPPlayer(MiniMaxPlayer):
+    """
+    A 'LazySMPPlayer' is a computerized player and inherits from 'MiniMaxPlayer'.
+    He searches together with helper processes (Lazy SMP). All processes search the same root one depth after
+    another and share a 'SharedTranspositionTable', so a process mostly finds the positions already searched by the
+    others. Every second helper starts one depth ahead, so the helpers fill the table for the next depth.
+    Only the move of his own search is played, the helpers are stopped as soon as it is finished.\n
+    With a single process he is the engine without helpers, which is the reference of chess.speedup.
+    """
+
+    def __init__(self, color: str, max_depth=3, table_size: int = 1 << 18, movetime: float = None,
+                 processes: int = 2, table_name: str = None):
+        # a helper attaches to the table of the main process by its name
+        super().__init__(color=color, max_depth=max_depth, table_size=table_size, movetime=movetime,
+                         table=SharedTranspositionTable(table_size, table_name))
+        self.name = 'LazySMPPlayer'
+        self.processes: int = processes
 
-            return min_score
+    def best_move(self, board: object) -> object:
+        """
+        Returns the best move by given depth.
+        """
+
+        self.reset_search()
+
+        book_move = self.book_move(board)
+        if book_move is not None:
+            return book_move
+
+        helpers = self.start_helpers(board.position)
+        try:
+            move = self.iterative_deepening(board.position, self.search, self.MAX_DEPTH)
+        finally:
+            self.stop_helpers(helpers)
+
+        # only the chosen move leaves the search as a 'Move'
+        return Move.unpack(move, board) if move != -1 else None
+
+    def start_helpers(self, position: object) -> list:
+        """
+        Starts one search of the position per helper process and returns their futures.
+        The helpers probe the same tablebase, otherwise the shared table would mix scores with and without it.
+        """
+
+        if self.processes <= 1:
+            return []
+
+        # the helpers are started again if the tablebase has changed since
+        tablebase = self.tablebase.path if self.tablebase is not None else None
+        if self.pool is not None and self.pool_settings != tablebase:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+        if self.pool is None:
+            self.stop_event = Event()
+            self.pool = ProcessPoolExecutor(max_workers=self.processes - 1, initializer=attach_helper,
+                                            initargs=(self.table.name, self.table.size, tablebase, self.stop_event))
+            self.pool_settings = tablebase
+
+        self.stop_event.clear()
+        fen = position.fen()
+
+        return [self.pool.submit(search_helper, self.table.name, fen, self.MAX_DEPTH + 1, 1 + (helper + 1) % 2)
+                for helper in range(self.processes - 1)]
+
+    def stop_helpers(self, helpers: list):
+        """
+        Stops the helper searches, waits for them and adds their nodes to the statistics.
+        """
+
+        if len(helpers) == 0:
+            return
+
+        self.stop_event.set()
+        for helper in helpers:
+            self.nodes += helper.result()
+
+    def close(self):
+        """
+        Shuts down the helper processes and releases the shared transposition table.
+        """
+
+        super().close()
+        self.table.close()
 
 
 class NegaScoutPlayer(ComputerizedPlayer):
+    """
+    A 'NegaScoutPlayer' is a computerized player and inherits from 'ComputerizedPlayer'.
+    He searches with a principal variation search (NegaScout), where scores are always from the view of the player
+    to move. Only the first move of a position is searched with the full window, all other moves are searched with
+    a zero-width window and only searched again if they turn out to be better.\n
+    The depths are searched one after another and each search starts with a small aspiration window around the score
+    of the previous depth. With a movetime or a clock (see set_clock) the search stops when the time is up and the
+    move of the last completed depth is returned.\n
+    With ponder he searches the predicted reply of the opponent during the turn of the opponent (see start_pondering).
+    """
 
-    def __init__(self, color: str, max_depth=3):
+    def __init__(self, color: str, max_depth=3, window: int = 25, table_size: int = 1 << 18, movetime: float = None,
+                 table_path: str = None, ponder: bool = False):
         super().__init__(color=color, name='NegaScoutPlayer')
+        self.next_move: int = -1
+        self.MAX_DEPTH = max_depth
+        self.WINDOW = window
+        self.movetime = movetime
+        self.ponder = ponder
+
+        # with a path the results are kept in a file for the next process (see FileTranspositionTable)
+        self.table = TranspositionTable(table_size) if table_path is None else \
+            FileTranspositionTable(table_path, table_size, 'static')
+
+        # two quiet moves per ply which caused a cutoff, they are searched early in sibling positions
+        self.killers: list[list[int]] = []
+
+        # one reusable list of packed moves per ply, so the search creates no 'Move' objects
+        self.buffers: list[list[int]] = []
+
+        # statistics of the last search
+        self.nodes: int = 0
+        self.researches: int = 0
+        self.score: int = 0
 
     def best_move(self, board: object) -> object:
-        return None
+        """
+        Returns the best move by given depth.
+        """
+
+        # the search of the turn of the opponent has already found the move if the opponent played the predicted reply
+        ponder_move = self.finish_pondering(board)
+        if ponder_move is not None:
+            return ponder_move
+
+        book_move = self.book_move(board)
+        if book_move is not None:
+            return book_move
+
+        self.reset_search()
+        move = self.iterative_deepening(board.position, self.search, self.MAX_DEPTH)
+
+        # only the chosen move leaves the search as a 'Move'
+        return Move.unpack(move, board) if move != -1 else None
+
+    def reset_search(self):
+        """
+        Resets the next move, the statistics and the lists of the last search.
+        """
+
+        self.next_move = -1
+        self.nodes = 0
+        self.researches = 0
+        self.killers = [[-1, -1] for _ in range(self.MAX_DEPTH + 1)]
+        self.buffers = [([], []) for _ in range(self.MAX_DEPTH + 1)]
+        self.score = 0
+
+    def close(self):
+        """
+        Stops pondering and closes the file of the transposition table.
+        """
+
+        self.stop_pondering()
+
+        if isinstance(self.table, FileTranspositionTable):
+            self.table.close()
+
+    def search(self, position: object, depth: int) -> int:
+        """
+        Searches the position with the passed depth and returns the best packed move or -1.
+        """
+
+        self.next_move = -1
+        self.score = self.aspiration_search(position, depth, self.score)
+
+        return self.next_move
+
+    def aspiration_search(self, position: object, depth: int, guess: int) -> int:
+        """
+        Searches the root with a window around the guessed score. If the score is outside the window,
+        the window is widened and the root is searched again.
+        """
+
+        window = self.WINDOW
+        infinity = self.CHECKMATE + 1
+
+        # the first depth has no previous score
+        if depth == 1:
+            return self.nega_scout(position, depth, - infinity, infinity, 0)
+
+        while True:
+            alpha = max(guess - window, - infinity)
+            beta = min(guess + window, infinity)
+            score = self.nega_scout(position, depth, alpha, beta, 0)
+
+            if alpha < score < beta or (alpha == - infinity and beta == infinity):
+                return score
+
+            self.researches += 1
+            guess = score
+            window *= 4
+
+    def nega_scout(self, position: object, depth: int, alpha: int, beta: int, ply: int) -> int:
+        """
+        A recursive principal variation search from the view of the player to move.
+        """
+
+        self.nodes += 1
+        alpha_start = alpha
+        hash_move = -1
+
+        if (self.nodes & 255) == 0 or self.stopped:
+            self.check_time()
+
+        # a position of the tablebase has an exact score, only the root is searched for its move
+        if self.tablebase is not None and ply != 0:
+            score = self.tablebase_score(position, ply)
+            if score is not None:
+                return score
+
+        entry = self.table.probe(position.hash)
+        if entry is not None:
+            hash_move = entry[4]
+
+            # the root is always searched, because the move itself is needed
+            if entry[1] >= depth and ply != 0:
+                score = self.search_score(entry[2], ply)
+
+                if entry[3] == EXACT:
+                    return score
+                elif entry[3] == LOWER:
+                    alpha = max(alpha, score)
+                elif entry[3] == UPPER:
+                    beta = min(beta, score)
+
+                if alpha >= beta:
+                    return score
+
+        if depth == 0:
+            score = position.evaluate()
+            score = score if position.white_move else - score
+            self.table.store(position.hash, 0, score, EXACT, -1)
+            return score
+
+        best_move = -1
+        best_score = - self.CHECKMATE - 1
+
+        # the later stages are only generated if no earlier move caused a cutoff
+        killers = tuple(self.killers[ply])
+        for move in ComputerizedPlayer.staged_moves(position, hash_move, killers, self.buffers[ply]):
+            captured = position.squares[move & 63]
+            position.make_move(move)
+
+            if best_move == -1:
+                score = - self.nega_scout(position, depth - 1, - beta, - alpha, ply + 1)
+            else:
+                # a zero-width window only proves whether the move is better than the best one
+                score = - self.nega_scout(position, depth - 1, - alpha - 1, - alpha, ply + 1)
+
+                if alpha < score < beta:
+                    self.researches += 1
+                    score = - self.nega_scout(position, depth - 1, - beta, - score, ply + 1)
+
+            position.unmake_move()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+
+                if ply == 0:
+                    self.next_move = move
+
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                if captured == 0 and self.killers[ply][0] != move:
+                    self.killers[ply] = [move, self.killers[ply][0]]
+                break
+
+        # the score of a checkmate or stalemate only depends on the position and the ply
+        if best_move == -1:
+            return - (self.CHECKMATE - ply) if position.in_check() else self.STALEMATE
+
+        # the score is only a bound if the search was cut off or no move reached the window
+        flag = EXACT
+        if best_score <= alpha_start:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+
+        self.table.store(position.hash, depth, self.table_score(best_score, ply), flag, best_move)
+        return best_score
+
+
+# the players of a worker process by their settings (see worker_settings) or by the name of the shared table,
+# the player is kept for all searches of the worker
+WORKER_PLAYERS: dict[object, MiniMaxPlayer] = {}
+
+
+def attach_worker(settings: tuple, stop_event: Event):
+    """
+    Creates the player of a worker process of the parallel search with the settings of the searching player,
+    the worker stops when the event is set.
+    """
+
+    max_depth, table_size, quiescence, batch, tablebase = settings
+
+    player = MiniMaxPlayer(color='white', max_depth=max_depth, table_size=table_size, batch=batch,
+                           quiescence=quiescence)
+    player.tablebase = Tablebase(tablebase) if tablebase is not None else None
+    player.stop_event = stop_event
+    player.same_depth = True
+    WORKER_PLAYERS[settings] = player
+
+
+def search_root_move(fen: str, move: int, depth: int, settings: tuple, seconds: float, alpha: int, beta: int) -> tuple:
+    """
+    Executes the packed root move on the position of the FEN and searches the remaining depth within the window.
+    Runs in a worker process of the parallel search and returns (score, nodes, best reply), the score is None
+    if the time was up.
+    """
+
+    player = WORKER_PLAYERS[settings]
+    position = Position(fen)
+    position.make_move(move)
+
+    # the position after the move is at ply 1 of the search, so a checkmate scores the same as in find_move
+    player.nodes = 0
+    player.stopped = False
+    player.root_depth = depth
+    player.buffers = [([], []) for _ in range(depth + 1)]
+    player.deadline = (perf_counter() + seconds) if seconds is not None else None
+
+    try:
+        score = player.find_move(position, depth - 1, alpha, beta)
+    except SearchTimeout:
+        return None, player.nodes, -1
+
+    entry = player.table.probe(position.hash)
+    return score, player.nodes, entry[4] if entry is not None else -1
+
+
+def attach_helper(name: str, table_size: int, tablebase: str, stop_event: Event):
+    """
+    Creates the player of a Lazy SMP helper process, which searches with the shared table of the passed name
+    and the tablebase of the path.
+    """
+
+    player = LazySMPPlayer(color='white', table_size=table_size, processes=1, table_name=name)
+    player.tablebase = Tablebase(tablebase) if tablebase is not None else None
+    player.stop_event = stop_event
+    WORKER_PLAYERS[name] = player
+
+
+def search_helper(name: str, fen: str, max_depth: int, first_depth: int) -> int:
+    """
+    Searches the position of the FEN from first_depth to max_depth until the helpers are stopped.
+    Runs in a helper process of the Lazy SMP search and returns the number of searched nodes.
+    """
+
+    player = WORKER_PLAYERS[name]
+    position = Position(fen)
+
+    player.nodes = 0
+    player.stopped = False
+    player.deadline = None
+    player.buffers = [([], []) for _ in range(max_depth + 1)]
+
+    try:
+        for depth in range(first_depth, max_depth + 1):
+            player.search(position, depth)
+    except SearchTimeout:
+        pass
+
+    return player.nodes
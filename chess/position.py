@@ -0,0 +1,381 @@
+from chess.bitboard import BitBoard, WHITE, BLACK, KING, KNIGHT, FULL, EN_PASSANT, CASTLING, PROMOTION
+from array import array
+import chess.evaluation as e
+import chess.zobrist as z
+
+
+# the initial position in the Forsyth-Edwards Notation
+START_FEN: str = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+# the integer codes of the FEN letters, uppercase letters are white pieces
+FEN_CODES: dict[str, int] = {'P': 1, 'N': 2, 'B': 3, 'R': 4, 'Q': 5, 'K': 6,
+                             'p': -1, 'n': -2, 'b': -3, 'r': -4, 'q': -5, 'k': -6}
+
+# [code] the FEN letter of a code, a negative code returns the letter of a black piece
+FEN_LETTERS: str = ' PNBRQKkqrbnp'
+
+
+class Position:
+    """
+    A 'Position' holds everything that is needed to generate and execute moves: the integer codes of the squares
+    (square = row * 8 + column), the bitboards, the player to move, the castling rights, the en passant square,
+    the move counters, the zobrist hash and the accumulators of the evaluation.\n
+    Moves are packed integers (see chess.bitboard.encode). Nothing is stored on the players, so a position can be
+    copied and searched independently of the board and of other searches.
+    """
+
+    def __init__(self, fen: str = START_FEN):
+        self.squares = array('b', bytes(64))
+        self.white_move: bool = True
+
+        # (white_queen_side, white_king_side, black_queen_side, black_king_side)
+        self.castling: tuple = (True, True, True, True)
+
+        # the square behind a pawn that has just moved two squares or -1
+        self.en_passant: int = -1
+
+        # the half moves since the last capture or pawn move and the number of the full move
+        self.halfmove: int = 0
+        self.fullmove: int = 1
+
+        # one entry per executed move: the move with the captured code in the bits above 16
+        # and all values of the position before the move
+        self.stack: list[tuple] = []
+
+        self.load_fen(fen)
+
+    def load_fen(self, fen: str):
+        """
+        Sets up the pieces, the player to move, the castling rights, the en passant square and the move counters
+        of a FEN string. The bitboards, the hash and the evaluation are calculated from scratch.
+        """
+
+        fields: list[str] = fen.split()
+        rows: list[str] = fields[0].split('/')
+
+        if len(rows) != 8:
+            raise Exception(f"FEN must contain 8 rows but contains {len(rows)}: '{fen}'")
+
+        self.squares = array('b', bytes(64))
+
+        for row, text in enumerate(rows):
+            column = 0
+
+            for char in text:
+                if char.isdigit():
+                    column += int(char)
+                elif char in FEN_CODES and column < 8:
+                    self.squares[row * 8 + column] = FEN_CODES[char]
+                    column += 1
+                else:
+                    raise Exception(f"Invalid row '{text}' in FEN '{fen}'")
+
+        self.white_move = (fields[1] if len(fields) > 1 else 'w') == 'w'
+
+        castling = fields[2] if len(fields) > 2 else '-'
+        self.castling = ('Q' in castling, 'K' in castling, 'q' in castling, 'k' in castling)
+
+        en_passant = fields[3] if len(fields) > 3 else '-'
+        self.en_passant = -1
+        if en_passant != '-':
+            self.en_passant = (8 - int(en_passant[1])) * 8 + 'abcdefgh'.index(en_passant[0])
+
+        self.halfmove = int(fields[4]) if len(fields) > 4 else 0
+        self.fullmove = int(fields[5]) if len(fields) > 5 else 1
+
+        self.bitboard = BitBoard(self)
+        self.hash: int = z.hash_position(self)
+        self.mg, self.eg, self.phase = e.evaluate_squares(self.squares)
+        self.stack = []
+
+    def fen(self) -> str:
+        """
+        Returns the position in the Forsyth-Edwards Notation.
+        """
+
+        rows: list[str] = []
+
+        for row in range(8):
+            text = ''
+            empty = 0
+
+            for code in self.squares[row * 8:row * 8 + 8]:
+                if code == 0:
+                    empty += 1
+                    continue
+
+                if empty != 0:
+                    text += str(empty)
+                    empty = 0
+                text += FEN_LETTERS[code]
+
+            rows.append(text + (str(empty) if empty != 0 else ''))
+
+        castling = ''.join(letter for letter, right in zip('QKqk', self.castling) if right)
+        castling = ''.join(sorted(castling, key='KQkq'.index)) or '-'
+
+        en_passant = '-'
+        if self.en_passant >= 0:
+            en_passant = 'abcdefgh'[self.en_passant % 8] + '87654321'[self.en_passant // 8]
+
+        side = 'w' if self.white_move else 'b'
+        return f"{'/'.join(rows)} {side} {castling} {en_passant} {self.halfmove} {self.fullmove}"
+
+    def copy(self) -> object:
+        """
+        Returns an independent copy of the position. The squares are copied as a single buffer.
+        The moves executed before are not copied, so the copy cannot take them back.
+        """
+
+        position = Position.__new__(Position)
+        position.squares = self.squares[:]
+        position.white_move = self.white_move
+        position.castling = self.castling
+        position.en_passant = self.en_passant
+        position.halfmove = self.halfmove
+        position.fullmove = self.fullmove
+        position.stack = []
+        position.bitboard = self.bitboard.copy()
+        position.hash = self.hash
+        position.mg, position.eg, position.phase = self.mg, self.eg, self.phase
+
+        return position
+
+    def color(self) -> int:
+        """
+        Returns the color to move (chess.bitboard.WHITE or BLACK).
+        """
+
+        return WHITE if self.white_move else BLACK
+
+    def king_square(self, color: int) -> int:
+        """
+        Returns the square of the king of the passed color.
+        """
+
+        return self.bitboard.pieces[color][KING].bit_length() - 1
+
+    def pins_and_checks(self) -> tuple:
+        """
+        Returns the bitboards (pinned, checkers) of the player to move.
+        """
+
+        return self.bitboard.pins_and_checks(WHITE if self.white_move else BLACK)
+
+    def in_check(self) -> bool:
+        """
+        Returns true or false whether the king of the player to move is in check.
+        """
+
+        return self.bitboard.in_check(WHITE if self.white_move else BLACK)
+
+    def legal_moves(self, moves: list[int] = None, captures: bool = True, quiets: bool = True, origins: int = FULL,
+                    pins_and_checks: tuple = ()) -> list[int]:
+        """
+        Creates the legal packed moves of the player to move, see chess.bitboard.BitBoard.legal_moves.
+        """
+
+        color = WHITE if self.white_move else BLACK
+        castling = self.castling[0:2] if color == WHITE else self.castling[2:4]
+
+        return self.bitboard.legal_moves(color, self.en_passant, castling, pins_and_checks, moves,
+                                         captures, quiets, origins)
+
+    def is_checkmate(self) -> bool:
+        """
+        Returns true or false whether the player to move is checkmated.
+        """
+
+        return len(self.legal_moves()) == 0 and self.in_check()
+
+    def is_stalemate(self) -> bool:
+        """
+        Returns true or false whether the player to move has no legal move but is not in check.
+        """
+
+        return len(self.legal_moves()) == 0 and not self.in_check()
+
+    def evaluate(self) -> int:
+        """
+        Returns the score of the position in centipawns from the view of white.
+        The accumulators are updated by every move, so no square has to be visited.
+        """
+
+        return e.taper(self.mg, self.eg, self.phase)
+
+    def make_move(self, move: int):
+        """
+        Executes a packed move (see chess.bitboard.encode) without creating any object for it.
+        The move has to be legal, it is taken back by unmake_move.
+        """
+
+        squares = self.squares
+        start = (move >> 6) & 63
+        end = move & 63
+        flag = (move >> 12) & 3
+        code = squares[start]
+        captured = squares[end]
+
+        # the codes before the move are needed to update the bitboards, the hash and the evaluation
+        changed: list[int] = Position.changed_squares(move)
+        before: list[int] = [squares[square] for square in changed]
+        self.stack.append((move | ((captured + 6) << 16), self.castling, self.en_passant, self.halfmove,
+                           self.hash, self.mg, self.eg, self.phase))
+
+        squares[start] = 0
+        squares[end] = code
+
+        # pawn promotion, the kind is stored in the highest bits
+        if flag == PROMOTION:
+            kind = ((move >> 14) & 3) + KNIGHT
+            squares[end] = (kind + 1) if code > 0 else - (kind + 1)
+
+        # only a pawn that moves two squares creates an en passant square
+        self.hash ^= z.en_passant_key(self.en_passant)
+        if (code == 1 or code == -1) and (start - end == 16 or end - start == 16):
+            self.en_passant = (start + end) // 2
+        else:
+            self.en_passant = -1
+        self.hash ^= z.en_passant_key(self.en_passant)
+
+        # en passant move
+        if flag == EN_PASSANT:
+            squares[(start & 56) | (end & 7)] = 0
+
+        # castling move
+        if flag == CASTLING:
+            self.castling_move(start, end)
+
+        # update castling rights
+        castling = self.castling
+        self.castling = Position.update_castling(castling, start, end, code)
+        self.hash ^= z.castling_key(castling) ^ z.castling_key(self.castling)
+
+        self.update_squares(changed, before)
+        self.hash ^= z.SIDE_KEY
+
+        # the counters of the 50 moves rule
+        if code == 1 or code == -1 or captured != 0:
+            self.halfmove = 0
+        else:
+            self.halfmove += 1
+        if not self.white_move:
+            self.fullmove += 1
+
+        self.white_move = not self.white_move
+
+    def unmake_move(self):
+        """
+        Takes back the last move executed by make_move.
+        """
+
+        squares = self.squares
+        entry, self.castling, self.en_passant, self.halfmove, self.hash, self.mg, self.eg, self.phase = \
+            self.stack.pop()
+        start = (entry >> 6) & 63
+        end = entry & 63
+        flag = (entry >> 12) & 3
+
+        code = squares[end]
+        if flag == PROMOTION:
+            code = 1 if code > 0 else -1
+
+        squares[start] = code
+        squares[end] = (entry >> 16) - 6
+
+        self.white_move = not self.white_move
+        if not self.white_move:
+            self.fullmove -= 1
+
+        # resets the captured pawn
+        if flag == EN_PASSANT:
+            squares[(start & 56) | (end & 7)] = -code
+
+        # castling move
+        if flag == CASTLING:
+            self.castling_move(start, end)
+
+        for square in Position.changed_squares(entry):
+            self.bitboard.update_square(square, squares[square])
+
+    @staticmethod
+    def update_castling(castling: tuple, start: int, end: int, code: int) -> tuple:
+        """
+        Returns the castling rights after a move.
+        A 'King' move disables both sides, a 'Rook' that moves or gets captured disables its side.
+        """
+
+        white_queen_side, white_king_side, black_queen_side, black_king_side = castling
+
+        if code == 6:
+            white_queen_side = False
+            white_king_side = False
+        elif code == -6:
+            black_queen_side = False
+            black_king_side = False
+
+        # the start and the end square of the rooks have to be checked,
+        # because a captured rook also disables castling
+        for square in (start, end):
+            if square == 56:
+                white_queen_side = False
+            elif square == 63:
+                white_king_side = False
+            elif square == 0:
+                black_queen_side = False
+            elif square == 7:
+                black_king_side = False
+
+        return white_queen_side, white_king_side, black_queen_side, black_king_side
+
+    def castling_move(self, start: int, end: int):
+        """
+        Executes or resets the 'Rook' move of a castling move of the king from start to end.
+        """
+
+        row = end & 56
+
+        # queen side castling move
+        if start - end == 2:
+            # swapping the rook with the blank square
+            rook, blank = row, end + 1
+
+        # king side castling move
+        else:
+            rook, blank = row + 7, end - 1
+
+        self.squares[rook], self.squares[blank] = self.squares[blank], self.squares[rook]
+
+    @staticmethod
+    def changed_squares(move: int) -> list[int]:
+        """
+        Returns all squares whose code is changed by the packed move.
+        """
+
+        start = (move >> 6) & 63
+        end = move & 63
+        flag = (move >> 12) & 3
+        changed: list[int] = [start, end]
+
+        if flag == EN_PASSANT:
+            changed.append((start & 56) | (end & 7))
+        elif flag == CASTLING:
+            row = end & 56
+            changed += [row, row + 3, row + 5, row + 7]
+
+        return changed
+
+    def update_squares(self, changed: list[int], before: list[int]):
+        """
+        Synchronizes the bitboards, the zobrist hash and the evaluation with the changed squares.
+        This covers promotions, en passant and castling, because all their squares are passed.
+        """
+
+        for square, code in zip(changed, before):
+            new_code = self.squares[square]
+            self.bitboard.update_square(square, new_code)
+            self.hash ^= z.PIECE_KEYS[code][square] ^ z.PIECE_KEYS[new_code][square]
+
+            self.mg += e.MG_SCORES[new_code][square] - e.MG_SCORES[code][square]
+            self.eg += e.EG_SCORES[new_code][square] - e.EG_SCORES[code][square]
+            self.phase += e.PHASES[new_code] - e.PHASES[code]
@@ -0,0 +1,72 @@
+from chess.players import LazySMPPlayer
+from chess.perft import POSITIONS
+from chess.epd import create_board
+from functools import partial
+from os import cpu_count
+import argparse
+
+
+def time_to_depth(fen: str, depth: int, processes: int) -> tuple:
+    """
+    Searches the position with a fresh 'LazySMPPlayer' up to the depth.
+    Returns the seconds until each depth was completed and the number of searched nodes of all processes.
+    """
+
+    board, player = create_board(fen, partial(LazySMPPlayer, processes=processes), depth, None)
+
+    try:
+        # a shallow search starts the helper processes, so their start is not part of the time to depth
+        player.MAX_DEPTH = 1
+        player.best_move(board)
+        player.MAX_DEPTH = depth
+        player.table.clear()
+
+        player.best_move(board)
+        return [seconds for (_, _, seconds) in player.depth_log], player.nodes
+    finally:
+        for each in board.players:
+            each.close()
+
+
+def run(positions: list[tuple], depth: int, processes: int) -> float:
+    """
+    Compares the time to depth of the single process engine with the Lazy SMP search of the passed number of
+    processes and prints the speedup of every depth. Returns the geometric mean of the speedups at the last depth.
+    """
+
+    # more processes than CPUs only take turns, the helpers then slow the search down instead of speeding it up
+    if processes > cpu_count():
+        print(f'only {cpu_count()} CPU(s) for {processes} processes, the speedup cannot be measured on this machine')
+
+    product = 1.0
+
+    for (name, fen) in positions:
+        single, single_nodes = time_to_depth(fen, depth, 1)
+        parallel, parallel_nodes = time_to_depth(fen, depth, processes)
+
+        for d, (single_seconds, parallel_seconds) in enumerate(zip(single, parallel)):
+            print(f'{name:<12} depth {d + 1}  1 process {single_seconds:7.2f} s  '
+                  f'{processes} processes {parallel_seconds:7.2f} s  speedup {single_seconds / parallel_seconds:5.2f}')
+
+        print(f'{name:<12} nodes  1 process {single_nodes}  {processes} processes {parallel_nodes}')
+        product *= single[-1] / parallel[-1]
+
+    speedup = product ** (1 / len(positions))
+    print(f'mean speedup at depth {depth} with {processes} processes: {speedup:.2f}')
+
+    return speedup
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures the time to depth of the Lazy SMP search.')
+    parser.add_argument('depth', type=int, nargs='?', default=4, help='the depth to search')
+    parser.add_argument('--processes', type=int, default=cpu_count(), help='the number of processes')
+    parser.add_argument('--fen', help='the position to search, otherwise the perft reference positions are used')
+    arguments = parser.parse_args()
+
+    positions = [('fen', arguments.fen)] if arguments.fen else [(name, fen) for (name, fen, _) in POSITIONS]
+    run(positions, arguments.depth, arguments.processes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+from chess.tables import KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS, ORTHOGONAL, DIAGONAL, ray_attacks
+from chess.bitboard import WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, squares as squares_of, popcount
+from time import perf_counter
+import numpy as np
+import argparse
+import mmap
+import struct
+
+
+# the material sets with the kind of the only piece besides the kings, the strong side is white in every table,
+# a pawn is promoted to a queen or a rook, so the tables of both have to be built before
+MATERIALS: dict[str, int] = {'KQK': QUEEN, 'KRK': ROOK, 'KPK': PAWN}
+
+# a bishop or a knight cannot checkmate a bare king
+DRAWN_KINDS: tuple = (BISHOP, KNIGHT)
+
+# the file starts with the number of tables, followed by the name and the offset of each table
+MAGIC: bytes = b'CTB1'
+HEADER: struct.Struct = struct.Struct('<4sI')
+DIRECTORY: struct.Struct = struct.Struct('<4sQ')
+
+# [side to move][strong king][weak king][piece], side 0 is the strong side
+SIZE: int = 2 * 64 * 64 * 64
+HALF: int = SIZE // 2
+
+# a value of a table is the number of half moves until the side to move checkmates (positive)
+# or the number plus one until it is checkmated (negative), 0 is a draw or an illegal position
+MAX_PLIES: int = 127
+
+
+def index(side: int, strong_king: int, weak_king: int, piece: int) -> int:
+    """
+    Returns the index of a position in a table, side 0 means that the strong side has to move.
+    """
+
+    return ((side * 64 + strong_king) * 64 + weak_king) * 64 + piece
+
+
+def attacks(kind: int, square: int, occupied: int) -> int:
+    """
+    Returns the squares attacked by a white piece of the kind on the square.
+    """
+
+    if kind == PAWN:
+        return PAWN_ATTACKS[WHITE][square]
+    if kind == KNIGHT:
+        return KNIGHT_ATTACKS[square]
+
+    directions = ORTHOGONAL if kind == ROOK else DIAGONAL if kind == BISHOP else range(8)
+
+    bits = 0
+    for direction in directions:
+        bits |= ray_attacks(square, occupied, direction)
+
+    return bits
+
+
+def is_legal(kind: int, strong_king: int, weak_king: int, piece: int) -> bool:
+    """
+    Returns true or false whether the three pieces can stand on the squares.
+    """
+
+    if strong_king == weak_king or piece == strong_king or piece == weak_king:
+        return False
+
+    if KING_ATTACKS[strong_king] & (1 << weak_king):
+        return False
+
+    # a pawn never stands on the first or the last row
+    return kind != PAWN or 8 <= piece < 56
+
+
+def strong_moves(kind: int, strong_king: int, weak_king: int, piece: int) -> tuple:
+    """
+    Returns the squares (king_squares, piece_squares, promotion_squares) the strong side can move to.
+    """
+
+    blocked = (1 << strong_king) | (1 << weak_king) | (1 << piece)
+    king_squares = KING_ATTACKS[strong_king] & ~blocked & ~KING_ATTACKS[weak_king]
+
+    if kind != PAWN:
+        return king_squares, attacks(kind, piece, blocked) & ~blocked, 0
+
+    # white pawns move towards row 0
+    pushes = 0
+    if not blocked & (1 << (piece - 8)):
+        pushes = 1 << (piece - 8)
+        if piece >= 48 and not blocked & (1 << (piece - 16)):
+            pushes |= 1 << (piece - 16)
+
+    return king_squares, pushes & ~0xFF, pushes & 0xFF
+
+
+def weak_moves(kind: int, strong_king: int, weak_king: int, piece: int) -> tuple:
+    """
+    Returns the squares (king_squares, capture) the weak king can move to and whether he can capture the piece.
+    """
+
+    attacked = KING_ATTACKS[strong_king] | attacks(kind, piece, 1 << strong_king)
+    king_squares = KING_ATTACKS[weak_king] & ~attacked & ~(1 << strong_king)
+    capture = bool(king_squares & (1 << piece))
+
+    return king_squares & ~(1 << piece), capture
+
+
+def generate(name: str, tables: dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Builds the table of the material set by retrograde analysis. All positions that are checkmated are found first,
+    then every half move adds the positions which can reach a lost position (won) and the positions
+    whose moves all reach won positions (lost), until nothing changes anymore. The remaining positions are drawn.
+    """
+
+    kind = MATERIALS[name]
+    width = 36 if kind != PAWN else 10
+
+    # the children of each position by their index in the table of the other side, -1 fills the rows
+    strong_children = np.full((HALF, width), -1, dtype=np.int32)
+    weak_children = np.full((HALF, 8), -1, dtype=np.int32)
+    strong_legal = np.zeros(HALF, dtype=bool)
+    weak_legal = np.zeros(HALF, dtype=bool)
+    weak_escapes = np.zeros(HALF, dtype=bool)
+    weak_mated = np.zeros(HALF, dtype=bool)
+
+    # a promotion leaves the table, the plies until mate are taken from the table of the new piece
+    promotions = np.full(HALF, MAX_PLIES + 1, dtype=np.int32)
+
+    for strong_king in range(64):
+        for weak_king in range(64):
+            for piece in range(64):
+                if not is_legal(kind, strong_king, weak_king, piece):
+                    continue
+
+                position = index(0, strong_king, weak_king, piece)
+                checked = attacks(kind, piece, 1 << strong_king) & (1 << weak_king)
+
+                # the weak side to move
+                weak_legal[position] = True
+                king_squares, capture = weak_moves(kind, strong_king, weak_king, piece)
+                children = [index(0, strong_king, square, piece) for square in squares_of(king_squares)]
+                weak_children[position, :len(children)] = children
+                weak_escapes[position] = capture
+                weak_mated[position] = len(children) == 0 and not capture and bool(checked)
+
+                # the strong side to move, the weak king must not be in check
+                if checked:
+                    continue
+
+                strong_legal[position] = True
+                king_squares, piece_squares, promotion_squares = strong_moves(kind, strong_king, weak_king, piece)
+                children = [index(0, square, weak_king, piece) for square in squares_of(king_squares)]
+                children += [index(0, strong_king, weak_king, square) for square in squares_of(piece_squares)]
+                strong_children[position, :len(children)] = children
+
+                for square in squares_of(promotion_squares):
+                    for promoted in ('KQK', 'KRK'):
+                        value = int(tables[promoted][HALF + index(0, strong_king, weak_king, square)])
+                        if value < 0:
+                            promotions[position] = min(promotions[position], - value)
+
+    # the plies until mate of each position, -1 is not (yet) decided, the last element is read by the fillers
+    strong_plies = np.full(HALF + 1, -1, dtype=np.int32)
+    weak_plies = np.full(HALF + 1, -1, dtype=np.int32)
+    weak_plies[:HALF][weak_mated] = 0
+
+    undecided_weak = weak_legal & ~weak_mated & ~weak_escapes
+    has_moves = (weak_children >= 0).any(axis=1)
+    last_promotion = int(promotions[promotions <= MAX_PLIES].max(initial=0))
+    unchanged = 0
+
+    for plies in range(1, MAX_PLIES + 1):
+        # two half moves without a new position decide the rest
+        if unchanged == 2 and plies > last_promotion:
+            break
+
+        if plies % 2 == 1:
+            # the strong side wins if one move reaches a lost position
+            won = strong_legal & (strong_plies[:HALF] < 0)
+            won &= ((weak_plies[strong_children] == plies - 1).any(axis=1)) | (promotions == plies)
+            strong_plies[:HALF][won] = plies
+            unchanged = 0 if won.any() else unchanged + 1
+        else:
+            # the weak side loses if all moves reach won positions, the filler counts as won
+            strong_plies[HALF] = 0
+            reached = strong_plies[weak_children]
+            strong_plies[HALF] = -1
+
+            lost = undecided_weak & has_moves & (weak_plies[:HALF] < 0)
+            lost &= (reached >= 0).all(axis=1) & (reached.max(axis=1) == plies - 1)
+            weak_plies[:HALF][lost] = plies
+            unchanged = 0 if lost.any() else unchanged + 1
+
+    table = np.zeros(SIZE, dtype=np.int8)
+    table[:HALF] = np.where(strong_plies[:HALF] > 0, strong_plies[:HALF], 0)
+    table[HALF:] = np.where(weak_plies[:HALF] >= 0, - weak_plies[:HALF] - 1, 0)
+
+    return table
+
+
+def build(path: str, names: list[str] = None) -> dict[str, np.ndarray]:
+    """
+    Builds the tables of the material sets and writes them into one file. Returns the tables by their name.
+    """
+
+    tables: dict[str, np.ndarray] = {}
+
+    for name in (names or list(MATERIALS)):
+        if name not in MATERIALS:
+            raise Exception(f"Unknown material set '{name}', known sets are {', '.join(MATERIALS)}")
+
+        # a pawn ending needs the tables of its promotions
+        if MATERIALS[name] == PAWN:
+            for promoted in ('KQK', 'KRK'):
+                if promoted not in tables:
+                    tables[promoted] = generate(promoted, tables)
+
+        if name not in tables:
+            tables[name] = generate(name, tables)
+
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, len(tables)))
+        offset = HEADER.size + DIRECTORY.size * len(tables)
+
+        for name in tables:
+            file.write(DIRECTORY.pack(name.encode(), offset))
+            offset += SIZE
+
+        for table in tables.values():
+            file.write(table.tobytes())
+
+    return tables
+
+
+class Tablebase:
+    """
+    A 'Tablebase' probes the tables of chess.tablebase.build for positions with both kings and a single piece.
+    The file is mapped into memory, so a probe only reads a single byte.
+    """
+
+    def __init__(self, path: str):
+        # the worker processes of a parallel search open the file again by its path
+        self.path: str = path
+        self.file = open(path, 'rb')
+        self.memory = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count = HEADER.unpack_from(self.memory, 0)
+        if magic != MAGIC:
+            raise Exception(f"'{path}' is not a tablebase file")
+
+        # [kind] the offset of the table of the kind
+        self.offsets: dict[int, int] = {}
+        for number in range(count):
+            name, offset = DIRECTORY.unpack_from(self.memory, HEADER.size + number * DIRECTORY.size)
+            self.offsets[MATERIALS[name.rstrip(b'\0').decode()]] = offset
+
+    def probe(self, position: object) -> int:
+        """
+        Returns the value of the position from the view of the player to move (see MAX_PLIES)
+        or None if the material of the position has no table.
+        """
+
+        bitboard = position.bitboard
+        if popcount(bitboard.occupied) != 3 or position.castling != (False, False, False, False):
+            return None
+
+        strong = WHITE if popcount(bitboard.occupancy[WHITE]) == 2 else BLACK
+        pieces = bitboard.pieces[strong]
+        kind = next(kind for kind in range(KING) if pieces[kind])
+
+        if kind in DRAWN_KINDS:
+            return 0
+        if kind not in self.offsets:
+            return None
+
+        strong_king = pieces[KING].bit_length() - 1
+        weak_king = bitboard.pieces[1 - strong][KING].bit_length() - 1
+        piece = pieces[kind].bit_length() - 1
+
+        # the tables are built for white, black is mirrored to the other side of the board
+        if strong == BLACK:
+            strong_king, weak_king, piece = strong_king ^ 56, weak_king ^ 56, piece ^ 56
+
+        side = 0 if position.white_move == (strong == WHITE) else 1
+        value = self.memory[self.offsets[kind] + index(side, strong_king, weak_king, piece)]
+
+        return value - 256 if value > MAX_PLIES else value
+
+    def close(self):
+        """
+        Unmaps the tables and closes the file.
+        """
+
+        self.memory.close()
+        self.file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Builds endgame tablebases by retrograde analysis.')
+    parser.add_argument('path', help='the tablebase file to write')
+    parser.add_argument('--sets', nargs='+', default=list(MATERIALS), help='the material sets, e.g. KQK KRK KPK')
+    arguments = parser.parse_args()
+
+    start = perf_counter()
+    tables = build(arguments.path, arguments.sets)
+
+    for name, table in tables.items():
+        print(f'{name}: {np.count_nonzero(table[:HALF] > 0)} won positions, longest mate in {int(table.max())} plies')
+    print(f'written to {arguments.path} in {perf_counter() - start:.1f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+# all tables are built once at import time and are indexed by square = row * 8 + column
+
+# [4] [0] [5]   -> the numbers represents the index of the direction
+# [3]  K  [1]   -> [0] to [3] inclusive represents orthogonally directions
+# [7] [2] [6]   -> [4] to [7] inclusive represents diagonally directions
+DIRECTIONS: list[tuple] = [(-1, 0), (0, 1), (1, 0), (0, -1), (-1, -1), (-1, 1), (1, 1), (1, -1)]
+ORTHOGONAL: range = range(0, 4)
+DIAGONAL: range = range(4, 8)
+
+# true if the squares of a direction are increasing, the nearest piece is then the lowest bit
+INCREASING: list[bool] = [(row * 8 + column) > 0 for (row, column) in DIRECTIONS]
+
+# knight offsets listed clockwise starting at 1 o'clock
+KNIGHT_OFFSETS: list[tuple] = [(-2, 1), (-1, 2), (1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1)]
+
+
+def on_board(row: int, column: int) -> bool:
+    """
+    Returns true or false whether the position is on the board.
+    """
+
+    return 0 <= row < 8 and 0 <= column < 8
+
+
+def create_jumps(offsets: list[tuple]) -> list[int]:
+    """
+    Creates the attacks of a piece which jumps to the passed offsets for every square.
+    """
+
+    table: list[int] = []
+
+    for square in range(64):
+        row, column = divmod(square, 8)
+        bits = 0
+
+        for (row_off, column_off) in offsets:
+            if on_board(row + row_off, column + column_off):
+                bits |= 1 << ((row + row_off) * 8 + column + column_off)
+
+        table.append(bits)
+
+    return table
+
+
+def create_rays() -> list[list[int]]:
+    """
+    Creates all squares from a square to the edge of the board in each direction (without the square itself).
+    """
+
+    table: list[list[int]] = []
+
+    for (row_off, column_off) in DIRECTIONS:
+        rays: list[int] = []
+
+        for square in range(64):
+            row, column = divmod(square, 8)
+            bits = 0
+
+            for i in range(1, 8):
+                if not on_board(row + i * row_off, column + i * column_off):
+                    break
+                bits |= 1 << ((row + i * row_off) * 8 + column + i * column_off)
+
+            rays.append(bits)
+
+        table.append(rays)
+
+    return table
+
+
+KNIGHT_ATTACKS: list[int] = create_jumps(KNIGHT_OFFSETS)
+KING_ATTACKS: list[int] = create_jumps(DIRECTIONS)
+
+# [0] are the squares attacked by a white pawn, [1] by a black pawn
+PAWN_ATTACKS: list[list[int]] = [create_jumps([(-1, -1), (-1, 1)]), create_jumps([(1, -1), (1, 1)])]
+
+RAYS: list[list[int]] = create_rays()
+
+
+def create_lines() -> tuple:
+    """
+    Creates the between(a, b) and line(a, b) tables. Both are empty if the squares are not on a common line.\n
+    between contains the squares strictly between a and b, line contains the whole line through a and b.
+    """
+
+    between: list[list[int]] = [[0] * 64 for _ in range(64)]
+    line: list[list[int]] = [[0] * 64 for _ in range(64)]
+
+    for direction, (row_off, column_off) in enumerate(DIRECTIONS):
+        opposite = DIRECTIONS.index((-row_off, -column_off))
+
+        for a in range(64):
+            full_line = RAYS[direction][a] | RAYS[opposite][a] | (1 << a)
+            ray = RAYS[direction][a]
+
+            while ray:
+                b = ray & -ray
+                ray ^= b
+                b = b.bit_length() - 1
+
+                between[a][b] = RAYS[direction][a] & RAYS[opposite][b]
+                line[a][b] = full_line
+
+    return between, line
+
+
+BETWEEN, LINE = create_lines()
+
+
+def nearest(bits: int, index: int) -> int:
+    """
+    Returns the bit of the nearest square in direction index or 0 if bits is empty.
+    """
+
+    if not bits:
+        return 0
+
+    return (bits & -bits) if INCREASING[index] else (1 << (bits.bit_length() - 1))
+
+
+def ray_attacks(square: int, occupied: int, index: int) -> int:
+    """
+    Returns all squares a sliding piece attacks in direction index, including the first blocking piece.
+    """
+
+    ray = RAYS[index][square]
+    blocker = nearest(ray & occupied, index)
+
+    if blocker:
+        return ray ^ RAYS[index][blocker.bit_length() - 1]
+
+    return ray
@@ -0,0 +1,249 @@
+from multiprocessing import shared_memory
+import mmap
+import os
+import struct
+
+
+# the flag of an entry tells whether the score is exact or only a bound
+EXACT: int = 0
+LOWER: int = 1
+UPPER: int = 2
+
+# [flag] the flag of the negated score, a lower bound of one player is an upper bound of the other
+FLIPPED: list[int] = [EXACT, UPPER, LOWER]
+
+# a shared entry packs the move (16 bits), the score (21 bits), the depth (7 bits) and the flag (2 bits) into one word,
+# the score is stored with an offset because the word has no sign
+SCORE_OFFSET: int = 1 << 20
+
+# is set in every stored data word, so an empty slot is never taken for an entry
+USED: int = 1 << 63
+
+# a file entry also stores the age of the search (8 bits) above the flag, older entries are replaced first
+AGE_SHIFT: int = 46
+
+# a file of another version is rejected, the version has to be increased whenever the zobrist keys, the evaluation,
+# the convention of the scores or the layout of the entries change, because the stored scores would be wrong,
+# the scores are from the view of the player to move and a checkmate counts the plies from the stored position
+FILE_VERSION: int = 2
+FILE_MAGIC: bytes = b'CTT1'
+
+# magic, version, number of slots, the number of times the file was opened and the kind of scores of the players
+# (e.g. 'quiesce' or 'static'), the slots follow at offset 32
+FILE_HEADER: struct.Struct = struct.Struct('<4sIQQ8s')
+FILE_SLOTS: int = 32
+
+
+class TranspositionTable:
+    """
+    A 'TranspositionTable' remembers the results of already searched positions by their zobrist hash.
+    It has a fixed number of slots, the slot of a position is selected by the lower bits of its hash.
+    Each entry is a tuple (key, depth, score, flag, move).
+    """
+
+    def __init__(self, size: int = 1 << 18):
+        # the size is rounded down to a power of two, so the slot can be selected with a mask
+        self.size: int = 1 << (size.bit_length() - 1)
+        self.mask: int = self.size - 1
+        self.entries: list = [None] * self.size
+
+        self.probes: int = 0
+        self.hits: int = 0
+
+    def probe(self, key: int) -> tuple:
+        """
+        Returns the entry of the position or None if the position is not stored.
+        """
+
+        self.probes += 1
+        entry = self.entries[key & self.mask]
+
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+
+        return None
+
+    def store(self, key: int, depth: int, score: int, flag: int, move: int):
+        """
+        Stores the result of a search. An entry of the same position is only replaced by a search of at least the
+        same depth, an entry of another position is always replaced.
+        """
+
+        index = key & self.mask
+        entry = self.entries[index]
+
+        if entry is None or entry[0] != key or depth >= entry[1]:
+            self.entries[index] = (key, depth, score, flag, move)
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+
+        self.entries = [None] * self.size
+        self.probes = 0
+        self.hits = 0
+
+
+class SharedTranspositionTable:
+    """
+    A 'SharedTranspositionTable' is a 'TranspositionTable' in shared memory, so several processes can search with
+    the same table. Another process attaches to the table by the name of the memory.\n
+    A slot consists of two 64 bit words: the key xored with the data and the data itself. There are no locks,
+    if two processes write the same slot at the same time, the key of the mixed words does not match anymore
+    and the torn entry is ignored like a missing one.
+    """
+
+    def __init__(self, size: int = 1 << 18, name: str = None):
+        # the size is rounded down to a power of two, so the slot can be selected with a mask
+        self.size: int = 1 << (size.bit_length() - 1)
+        self.mask: int = self.size - 1
+
+        # the process which creates the memory also removes it, the others only attach to it
+        self.owner: bool = name is None
+        self.memory = shared_memory.SharedMemory(name=name, create=self.owner, size=self.size * 16)
+        self.name: str = self.memory.name
+        self.words = self.memory.buf[:self.size * 16].cast('Q')
+
+        self.probes: int = 0
+        self.hits: int = 0
+
+    def probe(self, key: int) -> tuple:
+        """
+        Returns the entry (key, depth, score, flag, move) of the position or None if the position is not stored.
+        """
+
+        self.probes += 1
+        words = self.words
+        index = (key & self.mask) << 1
+        check = words[index]
+        data = words[index + 1]
+
+        if check ^ data != key or data == 0:
+            return None
+
+        self.hits += 1
+        move = data & 0xFFFF
+
+        return key, (data >> 37) & 127, ((data >> 16) & 0x1FFFFF) - SCORE_OFFSET, (data >> 44) & 3, \
+            move if move != 0xFFFF else -1
+
+    def store(self, key: int, depth: int, score: int, flag: int, move: int):
+        """
+        Stores the result of a search. An entry of the same position is only replaced by a search of at least the
+        same depth, an entry of another position is always replaced.
+        """
+
+        words = self.words
+        index = (key & self.mask) << 1
+        data = words[index + 1]
+
+        if words[index] ^ data != key or data == 0 or depth >= (data >> 37) & 127:
+            data = USED | (flag << 44) | (min(depth, 127) << 37) | ((score + SCORE_OFFSET) << 16) | (move & 0xFFFF)
+            words[index] = key ^ data
+            words[index + 1] = data
+
+    def clear(self):
+        """
+        Removes all entries of all processes.
+        """
+
+        self.memory.buf[:self.size * 16] = bytes(self.size * 16)
+        self.probes = 0
+        self.hits = 0
+
+    def close(self):
+        """
+        Detaches from the shared memory, the owner also removes it.
+        """
+
+        self.words.release()
+        self.memory.close()
+
+        if self.owner:
+            self.memory.unlink()
+
+
+class FileTranspositionTable(SharedTranspositionTable):
+    """
+    A 'FileTranspositionTable' is a 'SharedTranspositionTable' in a memory-mapped file, so the results of a search
+    are still available in the next process and can be used by several processes at the same time.\n
+    Every opening of the file starts a new age. An entry of an older age is always replaced, an entry of the
+    current age only by a search of at least the same depth.\n
+    The header names the kind of scores, a file of another kind or version is rejected instead of being reused.
+    """
+
+    def __init__(self, path: str, size: int = 1 << 18, scores: str = 'static'):
+        # the size is rounded down to a power of two, so the slot can be selected with a mask
+        self.size: int = 1 << (size.bit_length() - 1)
+        self.mask: int = self.size - 1
+        self.owner: bool = False
+        self.path: str = path
+        self.scores: str = scores
+        length = FILE_SLOTS + self.size * 16
+
+        self.file = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b')
+        header = self.file.read(FILE_HEADER.size)
+        kind = scores.encode()
+
+        # a new file or another size starts empty
+        magic, version, slots, generation, stored = (b'', 0, 0, 0, b'')
+        if len(header) == FILE_HEADER.size:
+            magic, version, slots, generation, stored = FILE_HEADER.unpack(header)
+            stored = stored.rstrip(b'\0')
+
+        # the scores of another version or another kind of search would be wrong, so the file is not used
+        if magic == FILE_MAGIC and (version != FILE_VERSION or stored != kind):
+            self.file.close()
+            raise Exception(f"'{path}' holds scores of version {version} ({stored.decode()}), "
+                            f"but version {FILE_VERSION} ({scores}) is needed, remove the file or pass another path")
+
+        if magic != FILE_MAGIC or slots != self.size:
+            self.file.truncate(0)
+            generation = 0
+        self.file.truncate(length)
+
+        self.memory = mmap.mmap(self.file.fileno(), length)
+        FILE_HEADER.pack_into(self.memory, 0, FILE_MAGIC, FILE_VERSION, self.size, generation + 1, kind)
+
+        self.age: int = (generation + 1) & 255
+        self.words = memoryview(self.memory)[FILE_SLOTS:length].cast('Q')
+
+        self.probes: int = 0
+        self.hits: int = 0
+
+    def store(self, key: int, depth: int, score: int, flag: int, move: int):
+        """
+        Stores the result of a search. An entry of an older age is always replaced, an entry of the current age only
+        by a search of at least the same depth.
+        """
+
+        words = self.words
+        index = (key & self.mask) << 1
+        data = words[index + 1]
+
+        if data == 0 or (data >> AGE_SHIFT) & 255 != self.age or depth >= (data >> 37) & 127:
+            data = USED | (self.age << AGE_SHIFT) | (flag << 44) | (min(depth, 127) << 37) | \
+                ((score + SCORE_OFFSET) << 16) | (move & 0xFFFF)
+            words[index] = key ^ data
+            words[index + 1] = data
+
+    def clear(self):
+        """
+        Removes all entries from the file.
+        """
+
+        self.memory[FILE_SLOTS:] = bytes(self.size * 16)
+        self.probes = 0
+        self.hits = 0
+
+    def close(self):
+        """
+        Writes the entries to the file and closes it.
+        """
+
+        self.words.release()
+        self.memory.flush()
+        self.memory.close()
+        self.file.close()
@@ -0,0 +1,52 @@
+from random import Random
+
+
+# a fixed seed keeps the keys equal between processes, so stored hashes stay valid
+RANDOM: Random = Random(20201219)
+
+# [code][square], a negative code directly returns the keys of a black piece (code 0 has no keys)
+PIECE_KEYS: list[list[int]] = [[0] * 64] + [[RANDOM.getrandbits(64) for _ in range(64)] for _ in range(12)]
+
+# one key for every combination of the four castling rights
+CASTLING_KEYS: list[int] = [RANDOM.getrandbits(64) for _ in range(16)]
+
+# one key per column of the en passant square
+EN_PASSANT_KEYS: list[int] = [RANDOM.getrandbits(64) for _ in range(8)]
+
+# is xored into the hash if black has to move
+SIDE_KEY: int = RANDOM.getrandbits(64)
+
+
+def castling_key(castling: tuple) -> int:
+    """
+    Returns the key of the castling rights (white_queen_side, white_king_side, black_queen_side, black_king_side).
+    """
+
+    return CASTLING_KEYS[castling[0] | (castling[1] << 1) | (castling[2] << 2) | (castling[3] << 3)]
+
+
+def en_passant_key(en_passant: int) -> int:
+    """
+    Returns the key of an en passant square or 0 if there is none (-1).
+    """
+
+    return EN_PASSANT_KEYS[en_passant & 7] if en_passant >= 0 else 0
+
+
+def hash_position(position: object) -> int:
+    """
+    Calculates the hash of a position from scratch. During a game the hash is updated incrementally by the position.
+    """
+
+    key = 0
+
+    for square, code in enumerate(position.squares):
+        key ^= PIECE_KEYS[code][square]
+
+    key ^= castling_key(position.castling)
+    key ^= en_passant_key(position.en_passant)
+
+    if not position.white_move:
+        key ^= SIDE_KEY
+
+    return key